@@ -19,8 +19,11 @@ strategy = True
 debug = False
 
 # superroutine: initializes bindings then calls the recursive DPLL.
+# clauses is a list of sets, or a ClauseStore, which is emptied as its clauses are turned into sets.
 def DPLLTop(clauses):
     global nAtoms
+    if isinstance(clauses, ClauseStore):
+        clauses = clauses.takeSets()
     nAtoms = 0
     for c in clauses:
         for lit in c:
@@ -29,6 +32,49 @@ def DPLLTop(clauses):
     found, bindings = DPLL(clauses,[0]*nAtoms,0)
     return found, bindings
 
+# Clause store for encoders that generate their clauses one at a time.
+# Each clause is kept once, as a tuple of literals (much smaller than a set), in the order it was added.
+# Unit clauses added first act as facts: a later clause containing one of their literals is already
+# satisfied, so it is dropped. DPLLTop(store) solves the stored clauses.
+class ClauseStore:
+    def __init__(self):
+        self.clauses = {}   # sorted tuple of literals -> None; a dict is a set that keeps the insertion order
+        self.facts = set()  # literals of the unit clauses
+        self.duplicates = 0
+        self.satisfied = 0
+
+    # Returns True if the clause was stored, False if it was a duplicate or already satisfied
+    def add(self, lits):
+        key = tuple(sorted(set(lits)))
+        if key in self.clauses:
+            self.duplicates += 1
+            return False
+        if len(key) > 1 and any(lit in self.facts for lit in key):
+            self.satisfied += 1
+            return False
+        if len(key) == 1:
+            self.facts.add(key[0])
+        self.clauses[key] = None
+        return True
+
+    def __len__(self):
+        return len(self.clauses)
+
+    def __iter__(self):
+        return iter(self.clauses)
+
+    # Returns the clauses as sets, in the order they were added, and empties the store. Each tuple is released
+    # as soon as its set is made, so the two forms of a clause are never held together.
+    def takeSets(self):
+        sets = []
+        while self.clauses:
+            clause, _ = self.clauses.popitem() # The last one; the list is put back in order below
+            sets.append(set(clause))
+        sets.reverse()
+        self.clauses = {} # popitem does not shrink the table
+        self.facts = set()
+        return sets
+
 # Recursive call to DPLL
 # depth is the depth of recursion. This is just there as defensive programming, in case some
 # bug would otherwise give rise to an infinite depth recursion
@@ -1,4 +1,4 @@
-from DPLL import DPLLTop
+from DPLL import ClauseStore, DPLLTop
 
 def parseInputFile(filename):
     with open(filename, "r") as f:  
@@ -29,18 +29,15 @@ def parseInputFile(filename):
 inDict = {}
 emptyDict = {}
 moveDict = {}
-clauses = []
+atomNames = {} # Identifier -> readable name, e.g. 3 -> "Empty(2,0)"
 nextMove = 1
 
-def addClause(*lits): # Converts a set of literals into a clause and appends it to a list
-    global clauses
-    clauses.append(set(lits))
-
 
 def getEmptyVar(vertex, time): # Returns an identifier for the empty variable of a vertex at a given time
     global nextMove
     if (vertex, time) not in emptyDict:
         emptyDict[(vertex, time)] = nextMove
+        atomNames[nextMove] = f"Empty({vertex},{time})"
         nextMove += 1
     return emptyDict[(vertex, time)]
 
@@ -49,6 +46,7 @@ def getMoveVar(u, v, time): # Returns an identifier for the move variable of a p
     global nextMove
     if (u, v, time) not in moveDict:
         moveDict[(u, v, time)] = nextMove
+        atomNames[nextMove] = f"Move({u},{v},{time})"
         nextMove += 1
     return moveDict[(u, v, time)]
 
@@ -57,6 +55,7 @@ def getInVar(u, v, time): # Returns an identifier for the variable of a piece in
     global nextMove
     if (u, v, time) not in inDict:
         inDict[(u, v, time)] = nextMove
+        atomNames[nextMove] = f"In({u},{v},{time})"
         nextMove += 1
     return inDict[(u, v, time)]    
 
@@ -77,16 +76,16 @@ def state_coherence(N, pieces, Z):
             pieceVars = []
             for piece in pieces:
                 inVar = getInVar(piece, vertex, time)
-                addClause(-emptyVar, -inVar) # Making sure that if a vertex is empty, no piece is in it e.g. ¬Empty(5,3) V ¬In(A,5,3).
+                yield (-emptyVar, -inVar) # Making sure that if a vertex is empty, no piece is in it e.g. ¬Empty(5,3) V ¬In(A,5,3).
                 pieceVars.append(inVar)
-            addClause(emptyVar, *pieceVars) # e.g. Empty(5,3) V In(A,5,3) V In(B,5,3) V etc.
+            yield (emptyVar, *pieceVars) # e.g. Empty(5,3) V In(A,5,3) V In(B,5,3) V etc.
     
     # II. No two pieces can share the same vertex (at time 0 and at time Z)
     for vertex in range(1, N+1):
         for i in range(len(pieces)):
             for j in range(i+1, len(pieces)):
-                addClause(-getInVar(pieces[i], vertex, 0), -getInVar(pieces[j], vertex, 0)) # At time 0, make sure no two pieces share the same vertex
-                addClause(-getInVar(pieces[i], vertex, Z), -getInVar(pieces[j], vertex, Z)) # At time Z, make sure no two pieces share the same vertex
+                yield (-getInVar(pieces[i], vertex, 0), -getInVar(pieces[j], vertex, 0)) # At time 0, make sure no two pieces share the same vertex
+                yield (-getInVar(pieces[i], vertex, Z), -getInVar(pieces[j], vertex, Z)) # At time Z, make sure no two pieces share the same vertex
 
 
 def precondition(Z, edges):
@@ -94,11 +93,11 @@ def precondition(Z, edges):
     for time in range(Z):
         for (u, v) in edges:
             moveVar = getMoveVar(u, v, time)
-            addClause(-moveVar, -getEmptyVar(u, time)) # e.g. ¬Move(U,V,T) ∧ Empty(U,T)
-            addClause(-moveVar, getEmptyVar(v, time)) # e.g. ¬Move(U,V,T) ∧ Empty(V,T)
+            yield (-moveVar, -getEmptyVar(u, time)) # e.g. ¬Move(U,V,T) ∧ Empty(U,T)
+            yield (-moveVar, getEmptyVar(v, time)) # e.g. ¬Move(U,V,T) ∧ Empty(V,T)
             moveVar2 = getMoveVar(v, u, time) # Consider the reverse move
-            addClause(-moveVar2, -getEmptyVar(v, time)) # e.g. ¬Move(V,U,T) ∧ Empty(V,T)
-            addClause(-moveVar2, getEmptyVar(u, time)) # e.g. ¬Move(V,U,T) ∧ Empty(U,T)
+            yield (-moveVar2, -getEmptyVar(v, time)) # e.g. ¬Move(V,U,T) ∧ Empty(V,T)
+            yield (-moveVar2, getEmptyVar(u, time)) # e.g. ¬Move(V,U,T) ∧ Empty(U,T)
 
 
 def causal(Z, edges, pieces):
@@ -107,18 +106,18 @@ def causal(Z, edges, pieces):
         for (u, v) in edges:
             moveVar = getMoveVar(u, v, time)
             for piece in pieces:
-                addClause(-getInVar(piece, u, time), -moveVar, getInVar(piece, v, time+1)) # -In(P,U,T) ∧ -Move(U,V,T) ∧ In(P,V,T+1)
+                yield (-getInVar(piece, u, time), -moveVar, getInVar(piece, v, time+1)) # -In(P,U,T) ∧ -Move(U,V,T) ∧ In(P,V,T+1)
             moveVar2 = getMoveVar(v, u, time) # Consider the reverse move
             for piece in pieces:
-                addClause(-getInVar(piece, v, time), -moveVar2, getInVar(piece, u, time+1))
+                yield (-getInVar(piece, v, time), -moveVar2, getInVar(piece, u, time+1))
                    
     # V. If a move from U to V occurs at time T, then at time T+1, U is empty and V is not empty
     for time in range(Z):
         for (u, v) in edges:
             moveVar = getMoveVar(u, v, time)
-            addClause(-moveVar, getEmptyVar(u, time+1)) # - Move(U,V,T) V Empty(U,T+1)
+            yield (-moveVar, getEmptyVar(u, time+1)) # - Move(U,V,T) V Empty(U,T+1)
             moveVar2 = getMoveVar(v, u, time) # Consider the reverse move
-            addClause(-moveVar2, getEmptyVar(v, time+1)) # - Move(V,U,T) V Empty(V,T+1)
+            yield (-moveVar2, getEmptyVar(v, time+1)) # - Move(V,U,T) V Empty(V,T+1)
     
 
 def frame(N, Z, edges, pieces):
@@ -130,20 +129,20 @@ def frame(N, Z, edges, pieces):
             lits = [-getEmptyVar(vertex, time), getEmptyVar(vertex, time+1)]
             for neighbor in neighbors[vertex]:
                 lits.append(getMoveVar(neighbor, vertex, time)) # e.g. -Empty(V,T) V Empty(V,T+1) V Move(U,V,T) V Move(W,V,T) etc.
-            addClause(*lits)
+            yield lits
 
     # VII. If a vertex is not empty at time T, but empty at time T+1, then there must be a move from it to one of its neighbors
         for vertex in range(1, N+1):
             lits = [getEmptyVar(vertex, time), -getEmptyVar(vertex, time+1)]
             for neighbor in neighbors[vertex]:
                 lits.append(getMoveVar(vertex, neighbor, time)) # e.g. Empty(V,T) V -Empty(V,T+1) V Move(V,U,T) V Move(V,W,T) etc.
-            addClause(*lits)
+            yield lits
 
     # VIII. If a piece is at vertex V at time T, then at time T + 1, either the piece is still at V or V is empty
     for time in range(Z):
         for vertex in range(1, N+1):
             for piece in pieces:
-                addClause(-getInVar(piece, vertex, time), getInVar(piece, vertex, time+1), getEmptyVar(vertex, time+1)) # e.g. -In(P,V,T) ∧ In(P,V,T+1) ∧ Empty(V,T+1)
+                yield (-getInVar(piece, vertex, time), getInVar(piece, vertex, time+1), getEmptyVar(vertex, time+1)) # e.g. -In(P,V,T) ∧ In(P,V,T+1) ∧ Empty(V,T+1)
 
 
 def single_move(edges, Z):
@@ -155,58 +154,45 @@ def single_move(edges, Z):
             possibleMoves.append(getMoveVar(v, u, time)) # e.g. Move(V,U,T)
         for i in range(len(possibleMoves)):
             for j in range(i+1, len(possibleMoves)):
-                addClause(-possibleMoves[i], -possibleMoves[j]) # e.g. ¬Move(U,V,T) ∧ ¬Move(W, X, T)
+                yield (-possibleMoves[i], -possibleMoves[j]) # e.g. ¬Move(U,V,T) ∧ ¬Move(W, X, T)
 
 
 def start_state(N, startState):
     # X. For each vertex, specify the piece in the vertex at time 0 or specify that the vertex is empty
     for vertex in range(1, N+1):
         if startState[vertex] == "Empty":
-            addClause(getEmptyVar(vertex, 0)) # e.g. Empty(V,0)
+            yield (getEmptyVar(vertex, 0),) # e.g. Empty(V,0)
         else:
-            addClause(getInVar(startState[vertex], vertex, 0)) # e.g. In(P,V,0)
+            yield (getInVar(startState[vertex], vertex, 0),) # e.g. In(P,V,0)
 
 
 def end_state(N, endState, Z):
     # XI. For each vertex, specify the piece in the vertex at time Z or specify that the vertex is empty
     for vertex in range(1, N+1):
         if endState[vertex] == "Empty":
-            addClause(getEmptyVar(vertex, Z)) # e.g. Empty(V,Z)
+            yield (getEmptyVar(vertex, Z),) # e.g. Empty(V,Z)
         else:
-            addClause(getInVar(endState[vertex], vertex, Z)) # e.g. In(P,V,Z)
+            yield (getInVar(endState[vertex], vertex, Z),) # e.g. In(P,V,Z)
 
 
 def convert_identifiers(lit):
-    # Reverse the mappings of the global dictionaries
-    emptyDict_rev = {v: key for key, v in emptyDict.items()}
-    inDict_rev = {v: key for key, v in inDict.items()}
-    moveDict_rev = {v: key for key, v in moveDict.items()}
-    if lit < 0:
-        atomID = -lit
-        prefix = "~"
-    else:
-        atomID = lit
-        prefix = ""
-    if atomID in emptyDict_rev:
-        vertex, time = emptyDict_rev[atomID]
-        return f"{prefix}Empty({vertex},{time})"
-    elif atomID in inDict_rev:
-        piece, vertex, time = inDict_rev[atomID]
-        return f"{prefix}In({piece},{vertex},{time})"
-    elif atomID in moveDict_rev:
-        u, v, time = moveDict_rev[atomID]
-        return f"{prefix}Move({u},{v},{time})"
-    else:
-        return f"{prefix}Unknown({atomID})"
-    
+    # Reverse the mapping of the identifiers, e.g. -3 -> "~Empty(2,0)"
+    atomID = abs(lit)
+    prefix = "~" if lit < 0 else ""
+    return prefix + atomNames.get(atomID, f"Unknown({atomID})")
+
+
+def isTrue(bindings, atomID): # Atoms past the end of bindings never reached the solver, so they are unbound
+    return atomID is not None and atomID < len(bindings) and bindings[atomID] == 1
+
 
 def interpretSolution(bindings, Z, edges): # Returns a sorted list of moves that form the solution
     plan = []
     for t in range(Z):
         for (u, v) in edges:
-            if bindings[getMoveVar(u, v, t)] == 1: # Checks the move in one direction, checking if a move occured (1) or not (0)
+            if isTrue(bindings, moveDict.get((u, v, t))): # Checks the move in one direction, checking if a move occured (1) or not (0)
                 plan.append((t, u, v))  # Print time as t+1
-            if bindings[getMoveVar(v, u, t)] == 1: # Checks the move in the reverse direction
+            if isTrue(bindings, moveDict.get((v, u, t))): # Checks the move in the reverse direction
                 plan.append((t, v, u))
     plan.sort(key=lambda x: x[0])
     return plan
@@ -227,34 +213,28 @@ def main():
 
     pieces = list(pieces)
 
-    # Build the axioms
-    state_coherence(N, pieces, Z)
-    precondition(Z, edges)
-    causal(Z, edges, pieces)
-    frame(N, Z, edges, pieces)
-    single_move(edges, Z)
-    start_state(N, startState)
-    end_state(N, endState, Z)
-
-    # Print the front end to the file
+    # Build the axioms, streaming them into the clause store and the front end file.
+    # The unit facts of the start and end states go first, so the clauses they satisfy are never stored.
+    store = ClauseStore()
     with open(frontend, "w") as f:
         f.write("Output from front end:\n")
-        for clause in clauses:
-            clause_str = " V ".join(convert_identifiers(lit) for lit in clause)
-            f.write(f"{clause_str}\n")
+        for axioms in (start_state(N, startState), end_state(N, endState, Z), state_coherence(N, pieces, Z),
+                       precondition(Z, edges), causal(Z, edges, pieces), frame(N, Z, edges, pieces),
+                       single_move(edges, Z)):
+            for clause in axioms:
+                if store.add(clause):
+                    clause_str = " V ".join(convert_identifiers(lit) for lit in clause)
+                    f.write(f"{clause_str}\n")
 
     # Run DPLL
-    success, bindings = DPLLTop(clauses)  
-    if success:
-        plan = interpretSolution(bindings, Z, edges)
-        if plan:
-           with open(backend, "w") as f:
-                f.write("Output from back end:\n")
-                for move in plan:
-                    f.write(f"Move({move[1]},{move[2]},{move[0]}) ")
-    else:
+    success, bindings = DPLLTop(store) # Consumes the store, one clause at a time
+    with open(backend, "w") as f:
         f.write("Output from back end:\n")
-        f.write("No solution found.\n")
+        if success:
+            for move in interpretSolution(bindings, Z, edges):
+                f.write(f"Move({move[1]},{move[2]},{move[0]}) ")
+        else:
+            f.write("No solution found.\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,129 @@
+def iter_bits(mask: int):
+    """
+    Iterates over the set bits of a mask, from the lowest to the highest.
+
+    Args:
+        mask (int): The bitmask
+
+    Yields:
+        int: The index of each set bit
+    """
+    while mask:
+        low = mask & -mask # Isolating the lowest set bit
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitsetGraph:
+    """
+    The graph with its vertices mapped to integer indexes in sorted order, so that a state is an int bitmask
+    (bit i set when the i-th vertex is in the state) and its set bits come out in sorted order.
+
+    Attributes:
+        names (list[str]): The vertex at each index
+        index (dict[str, int]): The index of each vertex
+        values (list[int]): The value of the vertex at each index
+        neighbors (list[int]): The mask of the neighbors of each vertex, not including itself
+        full (int): The mask of all vertices
+    """
+    def __init__(self, graph: dict[str, set[str]], vertex_values: dict[str, int]):
+        self.names = sorted(vertex_values)
+        self.index = {v: i for i, v in enumerate(self.names)}
+        self.values = [vertex_values[v] for v in self.names]
+        self.neighbors = [0] * len(self.names)
+        for v, i in self.index.items():
+            for u in graph.get(v, ()):
+                if u != v:
+                    self.neighbors[i] |= 1 << self.index[u]
+        self.full = (1 << len(self.names)) - 1
+
+    def to_mask(self, state: set[str]) -> int:
+        """
+        Converts a set of vertices to a bitmask.
+
+        Args:
+            state (set[str]): The state
+
+        Returns:
+            int: The bitmask of the state
+        """
+        mask = 0
+        for v in state:
+            mask |= 1 << self.index[v]
+        return mask
+
+    def to_names(self, mask: int) -> list[str]:
+        """
+        Converts a bitmask to the sorted list of its vertices.
+
+        Args:
+            mask (int): The bitmask of the state
+
+        Returns:
+            list[str]: The vertices in the state, in sorted order
+        """
+        return [self.names[i] for i in iter_bits(mask)]
+
+    def to_set(self, mask: int) -> set[str]:
+        """
+        Converts a bitmask to a set of vertices.
+
+        Args:
+            mask (int): The bitmask of the state
+
+        Returns:
+            set[str]: The state
+        """
+        return set(self.to_names(mask))
+
+    def value(self, mask: int) -> int:
+        """
+        Sums the values of the vertices in a state.
+
+        Args:
+            mask (int): The bitmask of the state
+
+        Returns:
+            int: The value of the state
+        """
+        return sum(self.values[i] for i in iter_bits(mask))
+
+    def blocked(self, mask: int) -> int:
+        """
+        Returns the vertices that are adjacent to the state, and so cannot be added to it.
+
+        Args:
+            mask (int): The bitmask of the state
+
+        Returns:
+            int: The bitmask of the blocked vertices
+        """
+        blocked = 0
+        for i in iter_bits(mask):
+            blocked |= self.neighbors[i]
+        return blocked
+
+    def can_add(self, i: int, mask: int) -> bool:
+        """
+        Checks whether a vertex can be added to a state without creating an edge.
+
+        Args:
+            i (int): The index of the vertex
+            mask (int): The bitmask of the state
+
+        Returns:
+            bool: True if no neighbor of the vertex is in the state
+        """
+        return self.neighbors[i] & mask == 0
+
+    def is_independent(self, mask: int) -> bool:
+        """
+        Checks whether no two vertices of a state are adjacent.
+
+        Args:
+            mask (int): The bitmask of the state
+
+        Returns:
+            bool: True if the state is an independent set
+        """
+        return self.blocked(mask) & mask == 0
@@ -0,0 +1,259 @@
+import argparse
+import math
+import random
+
+from mwis_exact import maximum_weight_independent_set
+
+
+def random_graph(n: int, avg_degree: float, rng: random.Random) -> set[tuple[int, int]]:
+    """
+    Generates a uniform random graph with n * avg_degree / 2 edges.
+
+    Args:
+        n (int): The number of vertices
+        avg_degree (float): The average degree
+        rng (random.Random): The random number generator
+
+    Returns:
+        set[tuple[int, int]]: The edges, as pairs of vertex indexes (smaller first)
+    """
+    num_edges = min(round(n * avg_degree / 2), n * (n - 1) // 2)
+    edges = set()
+    while len(edges) < num_edges:
+        u, v = rng.sample(range(n), 2)
+        edges.add((min(u, v), max(u, v)))
+    return edges
+
+
+def geometric_graph(n: int, avg_degree: float, rng: random.Random) -> set[tuple[int, int]]:
+    """
+    Generates a random geometric graph: points in the unit square, joined when closer than a radius chosen so that
+    the expected degree is about avg_degree.
+
+    Args:
+        n (int): The number of vertices
+        avg_degree (float): The average degree
+        rng (random.Random): The random number generator
+
+    Returns:
+        set[tuple[int, int]]: The edges, as pairs of vertex indexes (smaller first)
+    """
+    radius = math.sqrt(avg_degree / (math.pi * max(n, 1)))
+    points = [(rng.random(), rng.random()) for _ in range(n)]
+    cells = {} # Grid of cells of side radius, so only points in neighboring cells are compared
+    for i, (x, y) in enumerate(points):
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(i)
+    edges = set()
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((cx + dx, cy + dy), ()):
+                    for i in members:
+                        if i < j and math.dist(points[i], points[j]) < radius:
+                            edges.add((i, j))
+    return edges
+
+
+def planar_graph(n: int, avg_degree: float, rng: random.Random) -> set[tuple[int, int]]:
+    """
+    Generates a planar-like graph: a grid with one random diagonal per cell (a triangulation, average degree
+    close to 6), from which each edge is kept with the probability that gives about avg_degree.
+
+    Args:
+        n (int): The number of vertices
+        avg_degree (float): The average degree
+        rng (random.Random): The random number generator
+
+    Returns:
+        set[tuple[int, int]]: The edges, as pairs of vertex indexes (smaller first)
+    """
+    width = max(1, math.ceil(math.sqrt(n)))
+    candidates = []
+    for i in range(n):
+        row, col = divmod(i, width)
+        if col + 1 < width and i + 1 < n:
+            candidates.append((i, i + 1))
+        if i + width < n:
+            candidates.append((i, i + width))
+        if col + 1 < width and i + width + 1 < n:
+            if rng.random() < 0.5:
+                candidates.append((i, i + width + 1))
+            else:
+                candidates.append((i + 1, i + width))
+    keep = min(1.0, avg_degree * n / 2 / max(len(candidates), 1))
+    return {edge for edge in candidates if rng.random() < keep}
+
+
+GRAPH_KINDS = {"random": random_graph, "geometric": geometric_graph, "planar": planar_graph}
+
+
+def positive_float(text: str) -> float:
+    """
+    Argument type of the average degree, which must be positive (the geometric radius is derived from it).
+
+    Args:
+        text (str): The command line value
+
+    Returns:
+        float: The value
+    """
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {text}")
+    return value
+
+
+def vertex_values(n: int, distribution: str, low: int, high: int, rng: random.Random) -> list[int]:
+    """
+    Draws the vertex values.
+
+    Args:
+        n (int): The number of vertices
+        distribution (str): "uniform" (integers from low to high), "exponential" (low plus an exponential with
+            mean (high - low) / 4, capped at high) or "constant" (all equal to low)
+        low (int): The smallest value
+        high (int): The largest value
+        rng (random.Random): The random number generator
+
+    Returns:
+        list[int]: The value of each vertex
+    """
+    if distribution == "uniform":
+        return [rng.randint(low, high) for _ in range(n)]
+    if distribution == "exponential":
+        scale = max(high - low, 1) / 4
+        return [min(high, low + int(rng.expovariate(1 / scale))) for _ in range(n)]
+    return [low] * n
+
+
+def greedy_value(graph: dict[str, set[str]], values: dict[str, int]) -> int:
+    """
+    Value of the independent set built by taking the vertices by decreasing value: a lower bound on the optimum.
+
+    Args:
+        graph (dict[str, set[str]]): The graph representation
+        values (dict[str, int]): The values of the vertices
+
+    Returns:
+        int: The value of the greedy set
+    """
+    blocked = set()
+    total = 0
+    for v in sorted(values, key=lambda v: -values[v]):
+        if v not in blocked and values[v] > 0:
+            total += values[v]
+            blocked |= graph[v]
+            blocked.add(v)
+    return total
+
+
+def generate(kind: str,
+             n: int,
+             avg_degree: float,
+             distribution: str = "uniform",
+             low: int = 1,
+             high: int = 20,
+             target_fraction: float = 0.9,
+             seed: int = 0,
+             optimum: str = "exact") -> tuple[int, int, dict[str, int], list[str], list[tuple[str, str]]]:
+    """
+    Generates an instance. The target is target_fraction of the optimum, computed exactly with mwis_exact, or
+    of the greedy lower bound if optimum is "greedy" (for graphs too large to solve exactly).
+
+    Args:
+        kind (str): "random", "geometric" or "planar"
+        n (int): The number of vertices
+        avg_degree (float): The average degree
+        distribution (str): The distribution of the values (see vertex_values)
+        low (int): The smallest value
+        high (int): The largest value
+        target_fraction (float): The target as a fraction of the optimum
+        seed (int): The seed of the random number generator
+        optimum (str): "exact" or "greedy"
+
+    Returns:
+        tuple[int, int, dict[str, int], list[str], list[tuple[str, str]]]: The target, the optimum (or greedy bound), the vertices and their values, the list of vertices, and the list of edges
+    """
+    if not avg_degree > 0:
+        raise ValueError(f"the average degree must be positive, got {avg_degree}")
+    rng = random.Random(f"{kind}:{n}:{avg_degree}:{seed}")
+    width = len(str(max(n - 1, 0)))
+    vertex_list = [f"V{i:0{width}d}" for i in range(n)] # Zero-padded, so sorted order is numeric order
+    values = dict(zip(vertex_list, vertex_values(n, distribution, low, high, rng)))
+    edges = [(vertex_list[u], vertex_list[v]) for u, v in sorted(GRAPH_KINDS[kind](n, avg_degree, rng))]
+    graph = {v: set() for v in vertex_list}
+    for u, v in edges:
+        graph[u].add(v)
+        graph[v].add(u)
+    if optimum == "exact":
+        best = sum(values[v] for v in maximum_weight_independent_set(graph, values))
+    else:
+        best = greedy_value(graph, values)
+    return math.ceil(best * target_fraction), best, values, vertex_list, edges
+
+
+def write_instance(filename: str,
+                   target: int,
+                   flag: str,
+                   restarts: int,
+                   values: dict[str, int],
+                   vertex_list: list[str],
+                   edges: list[tuple[str, str]]) -> None:
+    """
+    Writes an instance in the input.txt format of both programs.
+
+    Args:
+        filename (str): The name of the file
+        target (int): The target value
+        flag (str): "V" for verbose output, "N" otherwise
+        restarts (int): The number of hill-climbing restarts
+        values (dict[str, int]): The vertices and their values
+        vertex_list (list[str]): The list of vertices
+        edges (list[tuple[str, str]]): The list of edges
+    """
+    with open(filename, "w") as f:
+        f.write(f"{target} {flag} {restarts}\n")
+        for v in vertex_list:
+            f.write(f"{v} {values[v]}\n")
+        f.write("\n")
+        for u, v in edges:
+            f.write(f"{u} {v}\n")
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line options.
+
+    Returns:
+        argparse.Namespace: The options
+    """
+    parser = argparse.ArgumentParser(description="Seeded generator of input files for hill climbing and iterative deepening")
+    parser.add_argument("--kind", choices=sorted(GRAPH_KINDS), default="random", help="kind of graph (default: random)")
+    parser.add_argument("--vertices", type=int, default=100, help="number of vertices (default: 100)")
+    parser.add_argument("--degree", type=positive_float, default=3.0, help="average degree (default: 3)")
+    parser.add_argument("--values", choices=["uniform", "exponential", "constant"], default="uniform",
+                        help="distribution of the vertex values (default: uniform)")
+    parser.add_argument("--min-value", type=int, default=1, help="smallest vertex value (default: 1)")
+    parser.add_argument("--max-value", type=int, default=20, help="largest vertex value (default: 20)")
+    parser.add_argument("--target-fraction", type=float, default=0.9, help="target as a fraction of the optimum (default: 0.9)")
+    parser.add_argument("--optimum", choices=["exact", "greedy"], default="exact",
+                        help="compute the optimum exactly, or use the greedy lower bound for large graphs")
+    parser.add_argument("--seed", type=int, default=0, help="seed (default: 0)")
+    parser.add_argument("--flag", choices=["V", "N"], default="N", help="verbose flag written to the file (default: N)")
+    parser.add_argument("--restarts", type=int, default=10, help="number of restarts written to the file (default: 10)")
+    parser.add_argument("--output", required=True, help="output file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    target, best, values, vertex_list, edges = generate(args.kind, args.vertices, args.degree, args.values,
+                                                        args.min_value, args.max_value, args.target_fraction,
+                                                        args.seed, args.optimum)
+    write_instance(args.output, target, args.flag, args.restarts, values, vertex_list, edges)
+    print(f"Wrote {args.output}: {len(vertex_list)} vertices, {len(edges)} edges, "
+          f"{'optimum' if args.optimum == 'exact' else 'greedy value'} {best}, target {target}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import csv
+import os
+import re
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from graph_generator import GRAPH_KINDS, generate, positive_float, write_instance
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROGRAMS = { # Command line of each search, after the input file
+    "hc": ["hill_climbing.py", "--stats"],
+    "sa": ["hill_climbing.py", "--stats", "--method", "sa"],
+    "tabu": ["hill_climbing.py", "--stats", "--method", "tabu"],
+    "id": ["iterative_deepening.py", "--stats"],
+    "id-prune": ["iterative_deepening.py", "--stats", "--prune"],
+}
+
+TRACED_BUDGET = 4 # The traced run is slower, so it gets this many times the budget; its peak is left empty if it runs out
+
+FIELDS = ["kind", "vertices", "edges", "seed", "optimum", "target", "program", "success", "timed_out", "seconds",
+          "nodes", "peak_kib"]
+
+
+def measure(script: str, args: list[str], traced: bool) -> None:
+    """
+    Runs a script in this process, and prints its time, or its peak memory under tracemalloc, to stderr. Tracing
+    slows the searches by different amounts, so the two are measured in separate runs.
+    This is what every benchmark subprocess runs.
+
+    Args:
+        script (str): The script to run
+        args (list[str]): Its command line arguments
+        traced (bool): True to measure the peak memory, False to measure the time
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    sys.argv = [script] + args
+    if traced:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            print(f"Peak memory: {peak}.", file=sys.stderr)
+        else:
+            print(f"Elapsed: {time.perf_counter() - start:.6f}.", file=sys.stderr)
+
+
+def run_measured(command: list[str], timeout: float) -> subprocess.CompletedProcess | None:
+    """
+    Runs a benchmark subprocess.
+
+    Args:
+        command (list[str]): The command line
+        timeout (float): The time after which it is killed, in seconds
+
+    Returns:
+        subprocess.CompletedProcess | None: The finished process, or None if it timed out
+    """
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr}")
+    return result
+
+
+def run_program(program: str, input_file: str, seed: int, budget: float) -> dict[str, object]:
+    """
+    Runs one search on one instance in a subprocess, killed after budget seconds, then once more under
+    tracemalloc for its peak memory (with TRACED_BUDGET times the budget).
+
+    Args:
+        program (str): A key of PROGRAMS
+        input_file (str): The instance
+        seed (int): The seed passed to the randomized searches
+        budget (float): The time budget, in seconds
+
+    Returns:
+        dict[str, object]: The success, timed_out, seconds, nodes and peak_kib fields of the result
+    """
+    script, *args = PROGRAMS[program]
+    args = args + ["--input", input_file]
+    if script == "hill_climbing.py":
+        args += ["--seed", str(seed)]
+    command = [sys.executable, os.path.abspath(__file__), "--measure", os.path.join(HERE, script)] + args
+    start = time.perf_counter()
+    result = run_measured(command, budget)
+    if result is None:
+        return {"success": False, "timed_out": True, "seconds": round(time.perf_counter() - start, 3), "nodes": "",
+                "peak_kib": ""}
+    nodes = re.search(r"Nodes visited: (\d+)", result.stdout)
+    elapsed = re.search(r"Elapsed: ([\d.]+)\.", result.stderr)
+    traced = run_measured([sys.executable, os.path.abspath(__file__), "--measure-memory"] + command[3:],
+                          budget * TRACED_BUDGET)
+    peak = re.search(r"Peak memory: (\d+)\.", traced.stderr) if traced is not None else None
+    return {"success": "Found solution" in result.stdout, "timed_out": False,
+            "seconds": round(float(elapsed.group(1)), 3), "nodes": int(nodes.group(1)) if nodes else "",
+            "peak_kib": int(peak.group(1)) // 1024 if peak else ""}
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line options.
+
+    Returns:
+        argparse.Namespace: The options
+    """
+    parser = argparse.ArgumentParser(description="Hill climbing vs. iterative deepening on generated graphs")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(GRAPH_KINDS), default=["random", "geometric", "planar"],
+                        help="kinds of graphs (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[20, 40, 80], help="numbers of vertices (default: 20 40 80)")
+    parser.add_argument("--degree", type=positive_float, default=3.0, help="average degree (default: 3)")
+    parser.add_argument("--values", choices=["uniform", "exponential", "constant"], default="uniform",
+                        help="distribution of the vertex values (default: uniform)")
+    parser.add_argument("--target-fraction", type=float, default=0.9, help="target as a fraction of the optimum (default: 0.9)")
+    parser.add_argument("--optimum", choices=["exact", "greedy"], default="exact",
+                        help="how the optimum behind the target is computed (default: exact)")
+    parser.add_argument("--seeds", type=int, default=3, help="number of instances per kind and size (default: 3)")
+    parser.add_argument("--restarts", type=int, default=20, help="hill-climbing restarts (default: 20)")
+    parser.add_argument("--programs", nargs="+", choices=sorted(PROGRAMS), default=["hc", "id"],
+                        help="searches to run (default: hc id)")
+    parser.add_argument("--budget", type=float, default=10.0, help="time budget of each run, in seconds (default: 10)")
+    parser.add_argument("--csv", default="benchmark.csv", help="output file (default: benchmark.csv)")
+    return parser.parse_args()
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] in ("--measure", "--measure-memory"): # A benchmark subprocess
+        measure(sys.argv[2], sys.argv[3:], sys.argv[1] == "--measure-memory")
+        return
+    args = parse_arguments()
+    rows = []
+    with tempfile.TemporaryDirectory() as directory, open(args.csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for kind in args.kinds:
+            for n in args.sizes:
+                for seed in range(args.seeds):
+                    target, best, values, vertex_list, edges = generate(kind, n, args.degree, args.values,
+                                                                        target_fraction=args.target_fraction,
+                                                                        seed=seed, optimum=args.optimum)
+                    input_file = os.path.join(directory, f"{kind}-{n}-{seed}.txt")
+                    write_instance(input_file, target, "N", args.restarts, values, vertex_list, edges)
+                    for program in args.programs:
+                        row = {"kind": kind, "vertices": n, "edges": len(edges), "seed": seed, "optimum": best,
+                               "target": target, "program": program}
+                        row.update(run_program(program, input_file, seed, args.budget))
+                        writer.writerow(row)
+                        f.flush()
+                        rows.append(row)
+
+    print(f"{'kind':<10} {'vertices':>8} {'program':<9} {'success':>8} {'mean s':>8}")
+    for kind in args.kinds:
+        for n in args.sizes:
+            for program in args.programs:
+                runs = [row for row in rows if row["kind"] == kind and row["vertices"] == n and row["program"] == program]
+                successes = sum(row["success"] for row in runs)
+                mean = sum(row["seconds"] for row in runs) / len(runs)
+                print(f"{kind:<10} {n:>8} {program:<9} {successes:>4}/{len(runs):<3} {mean:>8.2f}")
+    print(f"Results written to {args.csv}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
+import argparse
 import random
 
+from bitset_graph import BitsetGraph, iter_bits
+
+
 def read_input(filename: str) -> tuple[str, str, dict[str, int], list[str], list[tuple[str, str]]]:
     """
     Parses the input file, extracting the target value, the vertices and their values, and the edges.
@@ -55,140 +59,125 @@ def build_graph(vertex_list: list,
     return graph
 
 
-def random_start_state(vertex_list: list[str]) -> set:
+def random_start_state(vertex_list: list[str], rng: random.Random=random) -> set:
     """
     Generates a random start state.
 
     Args:
         vertex_list (list[str]): The list of vertices
-        graph (dict[str, set[str]]): The graph representation
+        rng (random.Random): The random number generator (the global one by default)
     
     Returns:
         set: The random start state
     """
     state = set()
     for vertex in vertex_list:
-        if random.choice([True, False]): # Randomly add the vertex (0.5) probability
+        if rng.choice([True, False]): # Randomly add the vertex (0.5) probability
             state.add(vertex)
     return state
 
 
-def evaluate_state(state: set[str],
-                   vertices: dict[str, int]) -> int:
+def restart_seed(seed: int, restart: int) -> str:
     """
-    Evaluates the current state.
+    Derives the seed of one restart. String seeds are hashed with SHA-512 by random.Random, so every restart gets
+    the same start state on every run, however many workers run them.
 
     Args:
-        state (set[str]): The current state
-        vertices (dict[str, int]): The vertices and their values
-    
+        seed (int): The seed of the run
+        restart (int): The number of the restart
+
     Returns:
-        int: The value of the state
+        str: The seed of the restart
     """
-    return sum([vertices[vertex] for vertex in state]) # Getting the sum of the values of the vertices in the state
+    return f"{seed}:{restart}"
 
 
-def is_valid_state(state: set[str],
-                   graph: dict[str, set[str]]) -> bool:
+def evaluate_state(state: set[str],
+                   vertices: dict[str, int]) -> int:
     """
-    Checks if the current state is valid.
+    Evaluates the current state.
 
     Args:
         state (set[str]): The current state
-        graph (dict[str, set[str]]): The graph representation
+        vertices (dict[str, int]): The vertices and their values
     
     Returns:
-        bool: True if the state is valid, False otherwise
+        int: The value of the state
     """
-    for vertex in state:
-        for neighbor in graph[vertex]:
-            if neighbor in state:
-                return False
-    return True
+    return sum([vertices[vertex] for vertex in state]) # Getting the sum of the values of the vertices in the state
 
 
-def count_edge_penalty(state: set[str],
-                       graph: dict[str, set[str]],
-                       vertex_values: dict[str, int]) -> int:
+def toggle_penalty(i: int,
+                   state: int,
+                   bits: BitsetGraph) -> int:
     """
-    Returns the sum of the costs of all edges in the state (where each edge is only counted once [using Q5])
+    Returns the cost of the edges between a vertex and the rest of the state, in O(degree).
+    Adding the vertex to the state raises the edge penalty by this amount, and removing it lowers it by the same amount.
 
     Args:
-        state (set[str]): The current state
-        graph (dict[str, set[str]]): The graph representation
-        vertex_values (dict[str, int]): The values of the vertices
+        i (int): The index of the vertex to add or remove
+        state (int): The bitmask of the current state
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
     
     Returns:
-        int: The sum of the costs of all edges in the state
+        int: The change in edge penalty
     """
+    value = bits.values[i]
     penalty = 0
-    state_list = list(state)   
-    for i in range(len(state_list)):
-        for j in range(i+1, len(state_list)):
-            u = state_list[i]
-            v = state_list[j]
-            if v in graph[u]:
-                penalty += min(vertex_values[u], vertex_values[v]) # Getting the lower end of the edge
+    adjacent = bits.neighbors[i] & state
+    while adjacent: # iter_bits inlined, as this is the innermost loop of the search
+        low = adjacent & -adjacent
+        adjacent ^= low
+        penalty += min(value, bits.values[low.bit_length() - 1]) # Getting the lower end of the edge
     return penalty
 
 
-def calculate_error(state: set,
-                    vertex_values: dict[str, int],
-                    target: int, 
-                    graph: dict[str, set[str]]) -> int:
+def mask_edge_penalty(state: int, bits: BitsetGraph) -> int:
     """
-    Calculates the error of the current state.
+    Returns the sum of the costs of all edges in the state, where the cost of an edge is the lower value of its ends.
+    Every edge is counted once, from its higher end.
 
     Args:
-        state (set): The current state
-        vertex_values (dict[str, int]): The values of the vertices
-        target (int): The target value
-        graph (dict[str, set[str]]): The graph representation
+        state (int): The bitmask of the current state
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
     
     Returns:
-        int: The error of the state
+        int: The sum of the costs of all edges in the state
     """
-    cost = evaluate_state(state, vertex_values) # Getting the value of the state
-    shortfall = max(0, target - cost) # Getting the shortfall
-    edge_penalty = count_edge_penalty(state, graph, vertex_values)
-    return shortfall + edge_penalty
+    return sum(toggle_penalty(i, state & ((1 << i) - 1), bits) for i in iter_bits(state))
 
 
-def get_neighbors(state: set[str],
-                  vertex_list: list[str],
-                  graph: dict[str, set[str]], 
-                  vertex_values: dict,
-                  target: int) -> list[set[str]]:
+def get_moves(state: int,
+              order: list[int],
+              bits: BitsetGraph,
+              target: int,
+              cost: int,
+              penalty: int):
     """
-    Generates the neighbors of the current state.
+    Scores the neighbors of the current state from its value and edge penalty, without building them.
+    The moves come in a fixed order: removals first, in vertex index order, then additions in vertex_list order.
 
     Args:
-        state (set[str]): The current state
-        vertex_list (list[str]): The list of vertices
-        graph (dict[str, set[str]]): The graph representation
-        vertex_values (dict[str, int]): The values of the vertices
+        state (int): The bitmask of the current state
+        order (list[int]): The indexes of the vertices, in vertex_list order
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
         target (int): The target value
+        cost (int): The value of the current state
+        penalty (int): The edge penalty of the current state
     
-    Returns:
-        list[set[str]]: The list of neighbors
+    Yields:
+        tuple[int, int, int, int]: The index of the vertex to toggle, and the value, edge penalty and error of the neighbor
     """
-    neighbors = [] # List to store the neighbors
-    for v in state:
-        neighbor = state.copy()
-        neighbor.remove(v)
-        cost = evaluate_state(neighbor, vertex_values)
-        error = calculate_error(neighbor, vertex_values, target, graph)
-        neighbors.append((neighbor, cost, error))
-    
-    for v in vertex_list: # Adding a vertex to the state
-        if v not in state: # Ensuring that the vertex is not already in the state
-            neighbor = state.copy()
-            neighbor.add(v)
-            cost = evaluate_state(neighbor, vertex_values)
-            error = calculate_error(neighbor, vertex_values, target, graph)
-            neighbors.append((neighbor, cost, error))
-    
-    return neighbors
+    for i in iter_bits(state):
+        neighbor_cost = cost - bits.values[i]
+        neighbor_penalty = penalty - toggle_penalty(i, state, bits)
+        yield i, neighbor_cost, neighbor_penalty, max(0, target - neighbor_cost) + neighbor_penalty
+
+    for i in order:
+        if not state >> i & 1:
+            neighbor_cost = cost + bits.values[i]
+            neighbor_penalty = penalty + toggle_penalty(i, state, bits)
+            yield i, neighbor_cost, neighbor_penalty, max(0, target - neighbor_cost) + neighbor_penalty
 
 
 def hill_climbing(target: int,
@@ -196,7 +185,10 @@ def hill_climbing(target: int,
                   vertex_list: list[str],
                   graph: dict[str, set[str]],
                   verbose: bool=False,
-                  start_state: set=None) -> tuple[set, bool]:
+                  start_state: set=None,
+                  bits: BitsetGraph=None,
+                  stop=None,
+                  stats: dict[str, int]=None) -> tuple[set, bool]:
     """
     Performs the hill climbing algorithm to find a solution.
 
@@ -207,65 +199,84 @@ def hill_climbing(target: int,
         graph (dict[str, set[str]]): The graph representation
         verbose (bool): True to print the state at each iteration
         start_state (set): The starting state
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks (built from graph if not given)
+        stop (Event): Checked before every move; the search gives up once it is set
+        stats (dict[str, int]): Counters of the neighbors scored ("nodes") and moves made, updated in place
     
     Returns:
         set: The solution state
     """
     if start_state is None: # Randomly choosing a start state
         start_state = random_start_state(vertex_list)
+    if bits is None:
+        bits = BitsetGraph(graph, vertex_values)
 
     if verbose:
         states = sorted(start_state)
         print(f"Randomly chosen start state: ", end="")
         print(*states if states else ["{}"], sep=" ", end=".\n")
     
-    current_state = start_state # Setting the current state to the start state
-    current_cost = evaluate_state(current_state, vertex_values) # Getting the value of the current state
-    current_error = calculate_error(current_state, vertex_values, target, graph) # Getting the error of the current state
+    current_state = bits.to_mask(start_state) # Setting the current state to the start state
+    order = [bits.index[v] for v in vertex_list]
+    current_cost = bits.value(current_state) # Getting the value of the current state
+    current_penalty = mask_edge_penalty(current_state, bits)
+    current_error = max(0, target - current_cost) + current_penalty # Getting the error of the current state
 
     if verbose:
-        current_state_space = ' '.join(sorted(current_state)) if current_state else "{}" # Getting the state space
+        current_state_space = ' '.join(bits.to_names(current_state)) if current_state else "{}" # Getting the state space
         print(f"{current_state_space} Value = {current_cost}. Error = {current_error}.")
 
     if current_error == 0: # If the randomly chosen state is already the goal state
-        return current_state, True
+        return bits.to_set(current_state), True
 
     while True:
-        neighbors = get_neighbors(current_state, vertex_list, graph, vertex_values, target) # Getting the neighbors of the current state
+        if stop is not None and stop.is_set(): # Another search already found a solution
+            return bits.to_set(current_state), False
+
+        # Find the neighbor with the smallest error; only that one is built
+        best_move = None
+        best_cost = None
+        best_penalty = None
+        best_error = float("inf") # To ensure comparison with neighbors
         if verbose:
             print("Neighbors:")
-            for neighbor, neighbor_cost, neighbor_error in neighbors: # Printing the neighbors
-                state_space = " ".join(sorted(neighbor)) if neighbor else "{}"
+        for move, neighbor_cost, neighbor_penalty, neighbor_error in get_moves(current_state, order, bits, target,
+                                                                               current_cost, current_penalty):
+            if verbose: # Printing the neighbors
+                neighbor = current_state ^ 1 << move
+                state_space = " ".join(bits.to_names(neighbor)) if neighbor else "{}"
                 print(f"{state_space} Value = {neighbor_cost}. Error = {neighbor_error}.")
                 if neighbor_error == 0:
-                    return neighbor, True
-            
-            print() 
-        # Find the neighbor with the smallest error
-        best_neighbor = None
-        best_cost = None
-        best_error = float("inf") # To ensure comparison with neighbors
-        for neighbor, neighbor_cost, neighbor_error in neighbors: # Finding the best neighbor
+                    return bits.to_set(neighbor), True
+            if stats is not None:
+                stats["nodes"] = stats.get("nodes", 0) + 1
             if neighbor_error < best_error:
-                best_neighbor = neighbor
+                best_move = move
                 best_cost = neighbor_cost
+                best_penalty = neighbor_penalty
                 best_error = neighbor_error
+        if verbose:
+            print()
 
-        if best_neighbor is None or best_error >= current_error: # If the best neighbor is not found or the error is not minimized
+        if best_move is None or best_error >= current_error: # If the best neighbor is not found or the error is not minimized
             if verbose: 
                 print("Search failed\n")
-            return current_state, False
+            return bits.to_set(current_state), False
 
+        best_neighbor = current_state ^ 1 << best_move # Toggling the chosen vertex
         if verbose:
-            state_space = " ".join(sorted(best_neighbor)) if best_neighbor else "{}"
+            state_space = " ".join(bits.to_names(best_neighbor)) if best_neighbor else "{}"
             print(f"Move to {state_space} Value = {best_cost}. Error = {best_error}.")
 
+        if stats is not None:
+            stats["moves"] = stats.get("moves", 0) + 1
         current_state = best_neighbor 
         current_cost = best_cost
+        current_penalty = best_penalty
         current_error = best_error
 
         if current_error == 0:
-            return current_state, True
+            return bits.to_set(current_state), True
             
 
 def hill_climbing_random_restarts(vertex_list: list,
@@ -273,7 +284,9 @@ def hill_climbing_random_restarts(vertex_list: list,
                                   vertex_values: dict,
                                   target: int,
                                   num_restarts: int,
-                                  verbose: bool=False) -> set:
+                                  verbose: bool=False,
+                                  stats: dict[str, int]=None,
+                                  seed: int=None) -> set:
     """
     Performs the hill climbing algorithm with random restarts, until a solution is found or the number of restarts is reached.
 
@@ -284,29 +297,78 @@ def hill_climbing_random_restarts(vertex_list: list,
         target (int): The target value
         num_restarts (int): The number of restarts
         verbose (bool): True to print the state at each iteration
+        stats (dict[str, int]): Counters of the restarts, neighbors scored and moves made, updated in place
+        seed (int): The seed of the run; restart i then starts from the same state as with parallel_random_restarts
     
     Returns:
         set: The solution state
     """
+    bits = BitsetGraph(graph, vertex_values) # Shared by all restarts
     for i in range(num_restarts): # Performing the hill climbing algorithm within the number of restarts
-        state, found = hill_climbing(target, vertex_values, vertex_list, graph, verbose)
+        if stats is not None:
+            stats["restarts"] = stats.get("restarts", 0) + 1
+        start_state = None # Drawn from the global generator
+        if seed is not None:
+            start_state = random_start_state(vertex_list, random.Random(restart_seed(seed, i)))
+        state, found = hill_climbing(target, vertex_values, vertex_list, graph, verbose, start_state=start_state,
+                                     bits=bits, stats=stats)
         if found:
             return state
     print("No solution found.")
     return None
 
 
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line options.
+
+    Returns:
+        argparse.Namespace: The options
+    """
+    parser = argparse.ArgumentParser(description="Hill climbing with random restarts")
+    parser.add_argument("--input", default="input.txt", help="input file (default: input.txt)")
+    parser.add_argument("--workers", type=int, default=1, help="run the restarts in this many processes")
+    parser.add_argument("--seed", type=int, help="seed for the random start states")
+    parser.add_argument("--method", choices=["hc", "sa", "tabu"], default="hc",
+                        help="hill climbing (default), simulated annealing or tabu search")
+    parser.add_argument("--max-iterations", type=int, help="iteration budget of each sa/tabu restart (default: 1000 per vertex)")
+    parser.add_argument("--time-limit", type=float, help="time budget of the whole sa/tabu run, in seconds")
+    parser.add_argument("--stats", action="store_true", help="print the neighbors scored, moves and restarts (summed over the workers)")
+    args = parser.parse_args()
+    if args.workers > 1 and args.method != "hc":
+        parser.error("--workers only applies to --method hc")
+    return args
+
+
 def main():
-    target, flag, random_num, vertex_values, vertex_list, edges = read_input("input.txt")
+    args = parse_arguments()
+    target, flag, random_num, vertex_values, vertex_list, edges = read_input(args.input)
     graph = build_graph(vertex_list, edges)
     verbose = (flag.upper() == "V")
     num_restarts = int(random_num)
-    solution = hill_climbing_random_restarts(vertex_list, graph, vertex_values, int(target), num_restarts, verbose)
+    stats = {}
+    if args.method != "hc":
+        from local_search import local_search_restarts # Only imported when used
+        if args.seed is not None:
+            random.seed(args.seed)
+        solution = local_search_restarts(args.method, vertex_list, graph, vertex_values, int(target), num_restarts,
+                                         args.max_iterations, args.time_limit, verbose, stats)
+    elif args.workers > 1:
+        from parallel_restarts import parallel_random_restarts # Only imported when used
+        solution = parallel_random_restarts(vertex_list, graph, vertex_values, int(target), num_restarts,
+                                            args.workers, args.seed, stats)
+        verbose = False # The workers do not print their searches
+    else:
+        solution = hill_climbing_random_restarts(vertex_list, graph, vertex_values, int(target), num_restarts, verbose,
+                                                 stats, args.seed)
     if solution:
         sol = " ".join(sorted(solution))
         if verbose:
             print()
         print(f"Found solution {sol} Value = {evaluate_state(solution, vertex_values)}")
+    if args.stats:
+        print(f"Nodes visited: {stats.get('nodes', 0)}. Moves: {stats.get('moves', 0)}. "
+              f"Restarts: {stats.get('restarts', 0)}.")
 
 
 if __name__ == "__main__":
@@ -1,3 +1,9 @@
+import argparse
+import heapq
+
+from bitset_graph import BitsetGraph, iter_bits
+
+
 def read_input(filename: str) -> tuple[str, str, dict[str, int], list[str], list[tuple[str, str]]]:
     """
     Parses the input file, extracting the target value, the vertices and their values, and the edges.
@@ -62,24 +68,6 @@ def build_graph(vertex_list: list,
     return graph
 
 
-def add_vertex(vertex: str, state: set[str], graph: dict[str, set[str]]) -> bool:
-    """
-    Adds a vertex to the state if it is a valid move.
-
-    Args:
-        vertex (str): The vertex to add
-        state (set[str]): The current state
-        graph (dict[str, set[str]]): The graph representation
-    
-    Returns:
-        bool: True if the vertex was added, False otherwise
-    """
-    for v in state:
-        if vertex in graph[v]:
-            return False
-    return True
-
-
 def depth_search(flag: str, 
                  state: set[str], 
                  curr_depth: int, 
@@ -87,7 +75,9 @@ def depth_search(flag: str,
                  target: int, 
                  graph: dict[str, set[str]],
                  vertex_values: dict[str, int],
-                 printed: set[tuple[str, ...]] = None) -> tuple[set[str] | None, bool, int]:
+                 printed: set[int] = None,
+                 prune: bool = False,
+                 stats: dict[str, int] = None) -> tuple[set[str] | None, bool, int]:
     """
     Performs a depth-first search to find a solution.
 
@@ -99,57 +89,159 @@ def depth_search(flag: str,
         target (int): The target value
         graph (dict[str, set[str]]): The graph representation
         vertex_values (dict[str, int]): The values of the vertices
-        printed (set[tuple[str, ...]], optional): The set of printed states
+        printed (set[int], optional): The bitmasks of the printed states
+        prune (bool, optional): True to cut the subtrees that cannot reach the target (see mask_search)
+        stats (dict[str, int], optional): Counters of the nodes visited and pruned, updated in place
     
     Returns:
         tuple[set[str] | None, bool, int]: The solution, a flag indicating whether the search expanded, and the max depth reached
     """
+    bits = BitsetGraph(graph, vertex_values)
+    mask = bits.to_mask(state)
+    solution, expand, max_depth = mask_search(flag, mask, bits.value(mask), bits.blocked(mask), curr_depth, depth_lim,
+                                              target, bits, printed, prune, stats)
+    return (bits.to_set(solution) if solution is not None else None), expand, max_depth
+
+
+def mask_search(flag: str,
+                state: int,
+                value: int,
+                blocked: int,
+                curr_depth: int,
+                depth_lim: int,
+                target: int,
+                bits: BitsetGraph,
+                printed: set[int] = None,
+                prune: bool = False,
+                stats: dict[str, int] = None) -> tuple[int | None, bool, int]:
+    """
+    depth_search on bitmask states. Children only add vertices after the highest one in the state, so the
+    candidates are the unblocked vertices above state.bit_length().
+
+    With prune, a subtree is cut when the state's value plus the largest depth_lim - curr_depth candidate values
+    is still below the target. No solution is lost, so the same solution is found, but the pruned states are not
+    printed. A pruned subtree reports the largest size it might have reached (capped at depth_lim), so that
+    iterative_deepening_search never stops early because of it.
+
+    Args:
+        flag (str): The flag to determine the type of search
+        state (int): The bitmask of the current state
+        value (int): The value of the current state
+        blocked (int): The bitmask of the vertices adjacent to the current state
+        curr_depth (int): The current depth
+        depth_lim (int): The depth limit
+        target (int): The target value
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
+        printed (set[int], optional): The bitmasks of the printed states
+        prune (bool, optional): True to cut the subtrees that cannot reach the target
+        stats (dict[str, int], optional): Counters of the nodes visited and pruned, updated in place
+    
+    Returns:
+        tuple[int | None, bool, int]: The solution bitmask, a flag indicating whether the search expanded, and the max depth reached
+    """
     if printed is None:
         printed = set()
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
 
     if curr_depth > 0 and curr_depth < depth_lim and flag == "V": # Prints the first state (even during expansion)
-        state_key = tuple(sorted(state))
-        if state_key not in printed:
-            printed.add(state_key)
-            total = sum(vertex_values[v] for v in state)
-            sorted_state = sorted(state)
-            print(*sorted_state, end = " ")
-            print(f"Value: {total}.")
-
+        if state not in printed:
+            printed.add(state)
+            print(*bits.to_names(state), end = " ")
+            print(f"Value: {value}.")
 
+    size = state.bit_count()
     if curr_depth == depth_lim: # If we reached the depth limit
         if state and flag == "V": # Prints the last state
-            total = sum(vertex_values[v] for v in state) # Calculate the total value
-            state = sorted(state) 
-            print(*state, end = " ")
-            print(f"Value: {total}.")
-        if state and sum(vertex_values[v] for v in state) >= target: # If the total value is greater than or equal to the target
-            return state, True, len(state) # Return the state as the solution
-        return None, False, len(state) # Otherwise, return None
+            print(*bits.to_names(state), end = " ")
+            print(f"Value: {value}.")
+        if state and value >= target: # If the total value is greater than or equal to the target
+            return state, True, size # Return the state as the solution
+        return None, False, size # Otherwise, return None
     
     expand = False # Flag to indicate whether the search expanded or not
-    max_depth = len(state) # Tracking the largest state size reached in a branch (to terminate early)
-
-    for v in sorted(vertex_values.keys()): # Iterate over the vertices
-        if state and v <= max(state): # If the vertex is less than or equal to the maximum vertex in the state
-            continue
-        if v not in state and add_vertex(v, state, graph): # If the vertex is not in the state and it is a valid move
-            new_state = state.copy() # Create a new state
-            new_state.add(v) # Add the vertex to the new state
-            expand = True # Set the flag to True
-            solution, child_expanded, child_max_size = depth_search(flag, new_state, curr_depth + 1, depth_lim, target, graph, vertex_values, printed) # Recursively call the function
-            max_depth = max(max_depth, child_max_size) # Update the max depth
-            if solution is not None: # If a solution is found
-                return solution, True, max_depth
-            if child_expanded:
-                expand = True
+    max_depth = size # Tracking the largest state size reached in a branch (to terminate early)
+
+    candidates = bits.full & ~blocked & ~((1 << state.bit_length()) - 1) # Unblocked vertices after the maximum one
+    if prune:
+        remaining = depth_lim - curr_depth
+        best_values = heapq.nlargest(remaining, (bits.values[v] for v in iter_bits(candidates)))
+        if value + sum(x for x in best_values if x > 0) < target: # Upper bound on any state in the subtree
+            if stats is not None:
+                stats["pruned"] = stats.get("pruned", 0) + 1
+            return None, candidates != 0, min(depth_lim, size + candidates.bit_count())
+    for v in iter_bits(candidates):
+        expand = True # Set the flag to True
+        solution, child_expanded, child_max_size = mask_search(flag, state | 1 << v, value + bits.values[v],
+                                                               blocked | bits.neighbors[v], curr_depth + 1, depth_lim,
+                                                               target, bits, printed, prune, stats) # Recursively call the function
+        max_depth = max(max_depth, child_max_size) # Update the max depth
+        if solution is not None: # If a solution is found
+            return solution, True, max_depth
+        if child_expanded:
+            expand = True
     return None, expand, max_depth
 
 
+def extend_frontier(flag: str,
+                    frontier: list[tuple[int, int, int]],
+                    target: int,
+                    bits: BitsetGraph,
+                    prune: bool = False,
+                    stats: dict[str, int] = None,
+                    max_frontier: int = None) -> tuple[int | None, list[tuple[int, int, int]] | None, bool]:
+    """
+    Searches one more depth from the states of the previous depth, instead of from the empty set. The children of
+    each state are generated in the order mask_search visits them, so the same solution is found.
+
+    Args:
+        flag (str): The flag to determine the type of search
+        frontier (list[tuple[int, int, int]]): The (state, value, blocked) bitmasks of the previous depth, in search order
+        target (int): The target value
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
+        prune (bool, optional): True to drop the states that cannot reach the target at any depth
+        stats (dict[str, int], optional): Counters of the nodes visited and pruned, updated in place
+        max_frontier (int, optional): The largest number of states kept for the next depth
+
+    Returns:
+        tuple[int | None, list[tuple[int, int, int]] | None, bool]: The solution bitmask, the states of this depth (None if there were more than max_frontier), and whether any state of this depth exists
+    """
+    next_frontier = []
+    reached = False
+    for state, value, blocked in frontier:
+        candidates = bits.full & ~blocked & ~((1 << state.bit_length()) - 1) # Unblocked vertices after the maximum one
+        for v in iter_bits(candidates):
+            child, child_value, child_blocked = state | 1 << v, value + bits.values[v], blocked | bits.neighbors[v]
+            reached = True
+            if stats is not None:
+                stats["nodes"] = stats.get("nodes", 0) + 1
+            if flag == "V":
+                print(*bits.to_names(child), end = " ")
+                print(f"Value: {child_value}.")
+            if child_value >= target:
+                return child, next_frontier, True
+            if next_frontier is None:
+                continue
+            if prune:
+                remaining = bits.full & ~child_blocked & ~((1 << v + 1) - 1)
+                if child_value + sum(max(0, bits.values[u]) for u in iter_bits(remaining)) < target:
+                    if stats is not None: # A dead end at every depth
+                        stats["pruned"] = stats.get("pruned", 0) + 1
+                    continue
+            next_frontier.append((child, child_value, child_blocked))
+            if max_frontier is not None and len(next_frontier) > max_frontier:
+                next_frontier = None # Over the memory cap: the next depths are searched from the empty set again
+    return None, next_frontier, reached
+
+
 def iterative_deepening_search(flag: str, 
                                target: int, 
                                graph: dict[str, set[str]], 
-                               vertex_values: dict[str, int]) -> None:
+                               vertex_values: dict[str, int],
+                               prune: bool = False,
+                               stats: dict[str, int] = None,
+                               keep_frontier: bool = False,
+                               max_frontier: int = 1000000) -> None:
     """
     Performs an iterative deepening search to find a solution.
 
@@ -158,7 +250,13 @@ def iterative_deepening_search(flag: str,
         target (int): The target value
         graph (dict[str, set[str]]): The graph representation
         vertex_values (dict[str, int]): The values of the vertices
+        prune (bool, optional): True to cut the subtrees that cannot reach the target
+        stats (dict[str, int], optional): Counters of the nodes visited and pruned, updated in place; the nodes visited at each depth are appended to stats["levels"]
+        keep_frontier (bool, optional): True to keep the states of each depth and only extend them at the next one (only the new states are printed)
+        max_frontier (int, optional): The largest number of states kept; beyond it the search goes back to starting from the empty set
     """
+    bits = BitsetGraph(graph, vertex_values)
+    frontier = [(0, 0, 0)] if keep_frontier else None # The states of the previous depth
     depth = 1
     prev_max_depth = 0  # Allows for early termination (to prevent identical searches)
     max_depth = len(vertex_values)
@@ -168,10 +266,17 @@ def iterative_deepening_search(flag: str,
                 print()
             print(f"Depth={depth}.")
 
-        solution, _, current_max_depth = depth_search(flag, set(), 0, depth, target, graph, vertex_values, printed=set()) # Perform a depth search
+        nodes = stats.get("nodes", 0) if stats is not None else 0
+        if frontier is not None:
+            solution, frontier, reached = extend_frontier(flag, frontier, target, bits, prune, stats, max_frontier)
+            current_max_depth = depth if reached else depth - 1
+        else:
+            solution, _, current_max_depth = mask_search(flag, 0, 0, 0, 0, depth, target, bits, set(), prune, stats) # Perform a depth search
+        if stats is not None:
+            stats.setdefault("levels", []).append(stats.get("nodes", 0) - nodes)
         if solution is not None: # If a solution is found
-            solution = sorted(solution) # Sort the solution
-            total = sum(vertex_values[v] for v in solution) # Calculate the total value
+            total = bits.value(solution) # Calculate the total value
+            solution = bits.to_names(solution) # The vertices of the solution, in sorted order
             if flag == "V":
                 print()
             print(f"Found solution", end=" ") 
@@ -188,10 +293,32 @@ def iterative_deepening_search(flag: str,
     print("No solution found")
 
 
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line options.
+
+    Returns:
+        argparse.Namespace: The options
+    """
+    parser = argparse.ArgumentParser(description="Iterative deepening search")
+    parser.add_argument("--input", default="input.txt", help="input file (default: input.txt)")
+    parser.add_argument("--prune", action="store_true", help="cut the subtrees that cannot reach the target")
+    parser.add_argument("--keep-frontier", action="store_true", help="extend the previous depth's states instead of starting over")
+    parser.add_argument("--max-frontier", type=int, default=1000000, help="largest number of states kept (default: 1000000)")
+    parser.add_argument("--stats", action="store_true", help="print the number of nodes visited")
+    return parser.parse_args()
+
+
 def main():
-    target, flag, vertex_values, vertex_list, edges = read_input("input.txt")
+    args = parse_arguments()
+    target, flag, vertex_values, vertex_list, edges = read_input(args.input)
     graph = build_graph(vertex_list, edges)
-    iterative_deepening_search(flag, int(target), graph, vertex_values)
+    stats = {"nodes": 0, "pruned": 0}
+    iterative_deepening_search(flag, int(target), graph, vertex_values, args.prune, stats, args.keep_frontier,
+                               args.max_frontier)
+    if args.stats:
+        print(f"Nodes visited: {stats['nodes']}. Pruned: {stats['pruned']}.")
+        print("Nodes per depth:", " ".join(f"{depth}:{nodes}" for depth, nodes in enumerate(stats["levels"], 1)))
 
 
 if __name__ == "__main__":
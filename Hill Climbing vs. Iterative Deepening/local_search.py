@@ -0,0 +1,254 @@
+import math
+import random
+import time
+
+from bitset_graph import BitsetGraph
+from hill_climbing import mask_edge_penalty, random_start_state, toggle_penalty
+
+ITERATIONS_PER_VERTEX = 1000 # Default iteration budget of a restart, so that a search without a solution ends
+
+
+def toggle(i: int,
+           state: int,
+           cost: int,
+           penalty: int,
+           target: int,
+           bits: BitsetGraph) -> tuple[int, int, int]:
+    """
+    Scores the neighbor reached by toggling one vertex, in O(degree), with the same error as hill_climbing.
+
+    Args:
+        i (int): The index of the vertex to add or remove
+        state (int): The bitmask of the current state
+        cost (int): The value of the current state
+        penalty (int): The edge penalty of the current state
+        target (int): The target value
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
+
+    Returns:
+        tuple[int, int, int]: The value, edge penalty and error of the neighbor
+    """
+    if state >> i & 1:
+        cost -= bits.values[i]
+        penalty -= toggle_penalty(i, state, bits)
+    else:
+        cost += bits.values[i]
+        penalty += toggle_penalty(i, state, bits)
+    return cost, penalty, max(0, target - cost) + penalty
+
+
+def out_of_budget(iteration: int, max_iterations: int, deadline: float) -> bool:
+    """
+    Checks the iteration and time budgets of a search.
+
+    Args:
+        iteration (int): The number of iterations done
+        max_iterations (int): The iteration budget (None for no limit)
+        deadline (float): The time.perf_counter() value at which to stop (None for no limit)
+
+    Returns:
+        bool: True if the search must stop
+    """
+    if max_iterations is not None and iteration >= max_iterations:
+        return True
+    return deadline is not None and iteration % 64 == 0 and time.perf_counter() >= deadline
+
+
+def print_state(prefix: str, state: int, cost: int, error: int, bits: BitsetGraph) -> None:
+    """
+    Prints a state in the format of hill_climbing.
+
+    Args:
+        prefix (str): The text printed before the state
+        state (int): The bitmask of the state
+        cost (int): The value of the state
+        error (int): The error of the state
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
+    """
+    state_space = " ".join(bits.to_names(state)) if state else "{}"
+    print(f"{prefix}{state_space} Value = {cost}. Error = {error}.")
+
+
+def simulated_annealing(target: int,
+                        bits: BitsetGraph,
+                        start_state: int,
+                        max_iterations: int = None,
+                        deadline: float = None,
+                        temperature: float = None,
+                        cooling: float = 0.999,
+                        rng: random.Random = random,
+                        verbose: bool = False,
+                        stats: dict[str, int] = None) -> tuple[int, bool]:
+    """
+    Simulated annealing over single-vertex toggles. Each iteration samples one vertex; the move is taken if it does
+    not increase the error, and otherwise with probability exp(-increase / temperature). The temperature is
+    multiplied by cooling after every iteration.
+
+    Args:
+        target (int): The target value
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
+        start_state (int): The bitmask of the starting state
+        max_iterations (int, optional): The iteration budget
+        deadline (float, optional): The time.perf_counter() value at which to stop
+        temperature (float, optional): The starting temperature (the mean vertex value by default)
+        cooling (float): The factor applied to the temperature after every iteration
+        rng (random.Random): The random number generator
+        verbose (bool): True to print every move taken
+        stats (dict[str, int], optional): Counters of the iterations, neighbors scored and moves, updated in place
+
+    Returns:
+        tuple[int, bool]: The bitmask of the best state seen, and whether it is a solution
+    """
+    n = len(bits.names)
+    if temperature is None:
+        temperature = max(1.0, sum(abs(x) for x in bits.values) / max(n, 1))
+    state = start_state
+    cost = bits.value(state)
+    penalty = mask_edge_penalty(state, bits)
+    error = max(0, target - cost) + penalty
+    best_state, best_error = state, error
+    iteration = 0
+    moves = 0
+    while best_error > 0 and n > 0 and not out_of_budget(iteration, max_iterations, deadline):
+        iteration += 1
+        i = rng.randrange(n)
+        new_cost, new_penalty, new_error = toggle(i, state, cost, penalty, target, bits)
+        if new_error <= error or rng.random() < math.exp((error - new_error) / temperature):
+            state ^= 1 << i
+            cost, penalty, error = new_cost, new_penalty, new_error
+            moves += 1
+            if verbose:
+                print_state("Move to ", state, cost, error, bits)
+            if error < best_error:
+                best_state, best_error = state, error
+        temperature = max(temperature * cooling, 1e-9)
+    if stats is not None:
+        stats["iterations"] = stats.get("iterations", 0) + iteration
+        stats["nodes"] = stats.get("nodes", 0) + iteration # One neighbor scored per iteration
+        stats["moves"] = stats.get("moves", 0) + moves
+    return best_state, best_error == 0
+
+
+def tabu_search(target: int,
+                bits: BitsetGraph,
+                start_state: int,
+                max_iterations: int = None,
+                deadline: float = None,
+                tenure: int = None,
+                sample_size: int = 100,
+                rng: random.Random = random,
+                verbose: bool = False,
+                stats: dict[str, int] = None) -> tuple[int, bool]:
+    """
+    Tabu search over single-vertex toggles. Each iteration scans up to sample_size vertices in random order and takes
+    the first move that lowers the error; if there is none, it takes the best move scanned, even if it raises the
+    error. A toggled vertex cannot be toggled again for tenure to 2 * tenure - 1 iterations (drawn at random, so that
+    the search does not settle into a cycle), unless that gives a new best error.
+
+    Args:
+        target (int): The target value
+        bits (BitsetGraph): The graph with its vertex indexes and neighbor masks
+        start_state (int): The bitmask of the starting state
+        max_iterations (int, optional): The iteration budget
+        deadline (float, optional): The time.perf_counter() value at which to stop
+        tenure (int, optional): The least number of iterations a toggled vertex stays tabu (a tenth of the vertices by default, between 7 and 20, and below half the vertices)
+        sample_size (int): The largest number of vertices scanned per iteration
+        rng (random.Random): The random number generator
+        verbose (bool): True to print every move taken
+        stats (dict[str, int], optional): Counters of the iterations, neighbors scored and moves, updated in place
+
+    Returns:
+        tuple[int, bool]: The bitmask of the best state seen, and whether it is a solution
+    """
+    n = len(bits.names)
+    if tenure is None:
+        tenure = max(1, min(max(7, n // 10), 20, (n - 1) // 2)) # At most n - 2 vertices are tabu at a time
+    tabu_until = [0] * n # Iteration until which each vertex is tabu
+    state = start_state
+    cost = bits.value(state)
+    penalty = mask_edge_penalty(state, bits)
+    error = max(0, target - cost) + penalty
+    best_state, best_error = state, error
+    iteration = 0
+    moves = 0
+    scored = 0
+    while best_error > 0 and n > 0 and not out_of_budget(iteration, max_iterations, deadline):
+        iteration += 1
+        chosen = None
+        for i in rng.sample(range(n), min(sample_size, n)):
+            scored += 1
+            new_cost, new_penalty, new_error = toggle(i, state, cost, penalty, target, bits)
+            if tabu_until[i] >= iteration and new_error >= best_error: # Tabu, and no new best
+                continue
+            if chosen is None or new_error < chosen[3]:
+                chosen = (i, new_cost, new_penalty, new_error)
+            if new_error < error: # First improvement
+                break
+        if chosen is None: # Every scanned move is tabu
+            continue
+        i, cost, penalty, error = chosen
+        state ^= 1 << i
+        tabu_until[i] = iteration + tenure + rng.randrange(tenure)
+        moves += 1
+        if verbose:
+            print_state("Move to ", state, cost, error, bits)
+        if error < best_error:
+            best_state, best_error = state, error
+    if stats is not None:
+        stats["iterations"] = stats.get("iterations", 0) + iteration
+        stats["nodes"] = stats.get("nodes", 0) + scored
+        stats["moves"] = stats.get("moves", 0) + moves
+    return best_state, best_error == 0
+
+
+def local_search_restarts(method: str,
+                          vertex_list: list,
+                          graph: dict,
+                          vertex_values: dict,
+                          target: int,
+                          num_restarts: int,
+                          max_iterations: int = None,
+                          time_limit: float = None,
+                          verbose: bool = False,
+                          stats: dict[str, int] = None) -> set:
+    """
+    Runs simulated annealing ("sa") or tabu search ("tabu") from random start states, like
+    hill_climbing_random_restarts. max_iterations applies to each restart and time_limit to the whole run.
+    Without max_iterations, each restart gets ITERATIONS_PER_VERTEX iterations per vertex.
+
+    Args:
+        method (str): "sa" or "tabu"
+        vertex_list (list): The list of vertices
+        graph (dict): The graph representation
+        vertex_values (dict): The values of the vertices
+        target (int): The target value
+        num_restarts (int): The number of restarts
+        max_iterations (int, optional): The iteration budget of each restart (ITERATIONS_PER_VERTEX per vertex by default)
+        time_limit (float, optional): The time budget of the whole run, in seconds
+        verbose (bool): True to print the start state and every move taken
+        stats (dict[str, int], optional): Counters of the restarts, iterations, neighbors scored and moves, updated in place
+
+    Returns:
+        set: The solution state
+    """
+    search = simulated_annealing if method == "sa" else tabu_search
+    bits = BitsetGraph(graph, vertex_values)
+    if max_iterations is None:
+        max_iterations = ITERATIONS_PER_VERTEX * max(len(bits.names), 1)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    for i in range(num_restarts):
+        if stats is not None:
+            stats["restarts"] = stats.get("restarts", 0) + 1
+        start_state = bits.to_mask(random_start_state(vertex_list))
+        if verbose:
+            print_state("Randomly chosen start state: ", start_state, bits.value(start_state),
+                        max(0, target - bits.value(start_state)) + mask_edge_penalty(start_state, bits), bits)
+        state, found = search(target, bits, start_state, max_iterations, deadline, verbose=verbose, stats=stats)
+        if found:
+            return bits.to_set(state)
+        if verbose:
+            print("Search failed\n")
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    print("No solution found.")
+    return None
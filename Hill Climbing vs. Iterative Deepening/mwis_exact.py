@@ -0,0 +1,328 @@
+import argparse
+
+from bitset_graph import iter_bits
+from iterative_deepening import build_graph, read_input
+
+
+def remove_vertex(v: str, adj: dict[str, set[str]]) -> None:
+    """
+    Removes a vertex and its edges from the graph.
+
+    Args:
+        v (str): The vertex to remove
+        adj (dict[str, set[str]]): The graph, modified in place
+    """
+    for u in adj.pop(v):
+        adj[u].discard(v)
+
+
+def reduce_graph(adj: dict[str, set[str]],
+                 weight: dict[str, int],
+                 stats: dict[str, int]) -> tuple[list[str], list[tuple[str, str]]]:
+    """
+    Applies the reductions below until none applies. Each one keeps at least one maximum-weight independent set.
+    - non-positive: a vertex with value <= 0 is never needed
+    - degree-0: an isolated vertex is taken
+    - degree-1: a vertex v whose only neighbor u is worth no more is taken; otherwise v is folded into u
+      (u's value drops by v's, and v is taken back if u ends up outside the solution)
+    - simplicial: a vertex whose neighbors form a clique and are worth no more than it is taken
+    - domination: a neighbor u of v with N[v] contained in N[u] and a value no larger than v's is removed
+
+    Args:
+        adj (dict[str, set[str]]): The graph, without self-loops, modified in place
+        weight (dict[str, int]): The values of the vertices, modified in place by the folds
+        stats (dict[str, int]): Counters of each reduction, updated in place
+
+    Returns:
+        tuple[list[str], list[tuple[str, str]]]: The vertices taken, and the folds (v, u) in the order they were made
+    """
+    taken = []
+    folds = []
+    changed = True
+    while changed:
+        changed = False
+        for v in sorted(adj):
+            if v not in adj:
+                continue
+            neighbors = adj[v]
+            if weight[v] <= 0:
+                remove_vertex(v, adj)
+                stats["non-positive"] = stats.get("non-positive", 0) + 1
+            elif not neighbors:
+                taken.append(v)
+                remove_vertex(v, adj)
+                stats["degree-0"] = stats.get("degree-0", 0) + 1
+            elif len(neighbors) == 1:
+                u = next(iter(neighbors))
+                if weight[v] >= weight[u]:
+                    taken.append(v)
+                    remove_vertex(u, adj)
+                    remove_vertex(v, adj)
+                    stats["degree-1"] = stats.get("degree-1", 0) + 1
+                else:
+                    weight[u] -= weight[v]
+                    folds.append((v, u))
+                    remove_vertex(v, adj)
+                    stats["folded"] = stats.get("folded", 0) + 1
+            elif weight[v] >= max(weight[u] for u in neighbors) and all(neighbors - {u} <= adj[u] for u in neighbors):
+                taken.append(v)
+                for u in list(neighbors):
+                    remove_vertex(u, adj)
+                remove_vertex(v, adj)
+                stats["simplicial"] = stats.get("simplicial", 0) + 1
+            else:
+                dominated = [u for u in neighbors if weight[u] <= weight[v] and neighbors - {u} <= adj[u]]
+                if not dominated:
+                    continue
+                for u in dominated:
+                    remove_vertex(u, adj)
+                stats["dominated"] = stats.get("dominated", 0) + len(dominated)
+            changed = True
+    return taken, folds
+
+
+def components(adj: dict[str, set[str]]) -> list[list[str]]:
+    """
+    Splits the graph into its connected components.
+
+    Args:
+        adj (dict[str, set[str]]): The graph
+
+    Returns:
+        list[list[str]]: The vertices of each component, in sorted order
+    """
+    seen = set()
+    result = []
+    for start in sorted(adj):
+        if start in seen:
+            continue
+        seen.add(start)
+        component = [start]
+        stack = [start]
+        while stack:
+            for u in adj[stack.pop()]:
+                if u not in seen:
+                    seen.add(u)
+                    component.append(u)
+                    stack.append(u)
+        result.append(sorted(component))
+    return result
+
+
+def clique_cover_bound(candidates: int, values: list[int], neighbors: list[int]) -> int:
+    """
+    Upper bound on the best independent set among the candidates: the vertices are put greedily into cliques, in
+    index order, and an independent set holds at most one vertex of each clique. With the vertices indexed by
+    decreasing value, the first vertex of each clique is its most valuable.
+
+    Args:
+        candidates (int): The bitmask of the vertices left
+        values (list[int]): The value of each vertex
+        neighbors (list[int]): The neighbor mask of each vertex
+
+    Returns:
+        int: The sum of the value of the first vertex of each clique
+    """
+    bound = 0
+    cliques = [] # The common neighbors of the members of each clique
+    while candidates:
+        low = candidates & -candidates
+        candidates ^= low
+        v = low.bit_length() - 1
+        for k, common in enumerate(cliques):
+            if common & low:
+                cliques[k] = common & neighbors[v]
+                break
+        else:
+            cliques.append(neighbors[v])
+            bound += values[v]
+    return bound
+
+
+def split_components(candidates: int, neighbors: list[int]) -> list[int]:
+    """
+    Splits a set of vertices into the connected components of the subgraph it induces.
+
+    Args:
+        candidates (int): The bitmask of the vertices
+        neighbors (list[int]): The neighbor mask of each vertex
+
+    Returns:
+        list[int]: The bitmask of each component
+    """
+    parts = []
+    while candidates:
+        component = frontier = candidates & -candidates
+        while frontier:
+            reached = 0
+            for v in iter_bits(frontier):
+                reached |= neighbors[v]
+            frontier = reached & candidates & ~component
+            component |= frontier
+        parts.append(component)
+        candidates &= ~component
+    return parts
+
+
+def solve_component(vertices: list[str],
+                    adj: dict[str, set[str]],
+                    weight: dict[str, int],
+                    stats: dict[str, int]) -> tuple[int, list[str]]:
+    """
+    Finds a maximum-weight independent set of one component by branch and bound. Every branch first takes the
+    vertices left without neighbors and the degree-1 vertices worth at least their neighbor, splits what remains
+    into components, and otherwise branches on the vertex with the most neighbors left (take it, or leave it out).
+    A branch is cut when the clique cover bound of its vertices cannot beat the best value known.
+
+    Args:
+        vertices (list[str]): The vertices of the component
+        adj (dict[str, set[str]]): The graph
+        weight (dict[str, int]): The values of the vertices
+        stats (dict[str, int]): Counters of the branch-and-bound nodes, updated in place
+
+    Returns:
+        tuple[int, list[str]]: The value of the best set, and its vertices
+    """
+    vertices = sorted(vertices, key=lambda v: -weight[v]) # Indexed by decreasing value, for clique_cover_bound
+    index = {v: i for i, v in enumerate(vertices)}
+    values = [weight[v] for v in vertices]
+    neighbors = [sum(1 << index[u] for u in adj[v]) for v in vertices]
+
+    def simplify(candidates: int) -> tuple[int, int, int]:
+        # The degree-0 and degree-1 reductions of reduce_graph, on the vertices left (without folding)
+        value, taken = 0, 0
+        changed = True
+        while changed:
+            changed = False
+            for v in iter_bits(candidates):
+                if not candidates >> v & 1:
+                    continue
+                adjacent = neighbors[v] & candidates
+                if adjacent == 0 or (adjacent & (adjacent - 1) == 0 and values[v] >= values[adjacent.bit_length() - 1]):
+                    value += values[v]
+                    taken |= 1 << v
+                    candidates &= ~adjacent & ~(1 << v)
+                    changed = True
+        return value, taken, candidates
+
+    solved = {} # Components already solved exactly, which recur in different branches
+
+    def solve(candidates: int, lower: int) -> tuple[int, int]:
+        # The best set among the candidates, if it is worth more than lower; otherwise some set worth at most lower
+        stats["nodes"] = stats.get("nodes", 0) + 1
+        value, taken, candidates = simplify(candidates)
+        lower -= value
+        if candidates == 0 or clique_cover_bound(candidates, values, neighbors) <= lower:
+            return value, taken
+        parts = split_components(candidates, neighbors)
+        if len(parts) > 1: # Independent subproblems
+            bounds = [clique_cover_bound(part, values, neighbors) for part in parts]
+            for k, part in enumerate(parts):
+                part_lower = lower - sum(bounds[k + 1:])
+                if part in solved:
+                    part_value, part_set = solved[part]
+                else:
+                    part_value, part_set = solve(part, part_lower)
+                    if part_value > part_lower: # The exact best of this component
+                        solved[part] = (part_value, part_set)
+                value += part_value
+                taken |= part_set
+                lower -= part_value
+            return value, taken
+        pivot, degree = None, -1
+        for v in iter_bits(candidates):
+            d = (neighbors[v] & candidates).bit_count()
+            if d > degree:
+                pivot, degree = v, d
+        with_value, with_set = solve(candidates & ~neighbors[pivot] & ~(1 << pivot), lower - values[pivot])
+        with_value += values[pivot]
+        without_value, without_set = solve(candidates & ~(1 << pivot), max(lower, with_value))
+        if without_value > with_value:
+            return value + without_value, taken | without_set
+        return value + with_value, taken | with_set | 1 << pivot
+
+    greedy_value, greedy_set = 0, 0
+    candidates = (1 << len(vertices)) - 1
+    for v in range(len(vertices)): # Greedy start by decreasing value, so that the bound cuts from the first branch
+        if candidates >> v & 1:
+            greedy_value += values[v]
+            greedy_set |= 1 << v
+            candidates &= ~neighbors[v] & ~(1 << v)
+    best_value, best_set = solve((1 << len(vertices)) - 1, greedy_value)
+    if best_value <= greedy_value:
+        best_value, best_set = greedy_value, greedy_set
+    return best_value, [vertices[i] for i in iter_bits(best_set)]
+
+
+def maximum_weight_independent_set(graph: dict[str, set[str]],
+                                   vertex_values: dict[str, int],
+                                   stats: dict[str, int] = None) -> set[str]:
+    """
+    Finds a maximum-weight independent set: reduce the graph, then solve each connected component on its own.
+    Self-loops are ignored, as in iterative_deepening. If no vertex has a positive value, the best single vertex
+    is returned, so that the set is not empty.
+
+    Args:
+        graph (dict[str, set[str]]): The graph representation
+        vertex_values (dict[str, int]): The values of the vertices
+        stats (dict[str, int], optional): Counters of the reductions, components and branch-and-bound nodes, updated in place
+
+    Returns:
+        set[str]: The vertices of the set
+    """
+    if stats is None:
+        stats = {}
+    adj = {v: set(graph.get(v, ())) - {v} for v in vertex_values}
+    weight = dict(vertex_values)
+    taken, folds = reduce_graph(adj, weight, stats)
+    solution = set(taken)
+    parts = components(adj)
+    stats["components"] = len(parts)
+    stats["largest component"] = max((len(part) for part in parts), default=0)
+    for part in parts:
+        _, part_solution = solve_component(part, adj, weight, stats)
+        solution.update(part_solution)
+    for v, u in reversed(folds): # Undo the folds, latest first
+        if u not in solution:
+            solution.add(v)
+    if not solution and vertex_values:
+        solution = {max(sorted(vertex_values), key=vertex_values.get)}
+    return solution
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line options.
+
+    Returns:
+        argparse.Namespace: The options
+    """
+    parser = argparse.ArgumentParser(description="Exact maximum-weight independent set for the same input file")
+    parser.add_argument("--input", default="input.txt", help="input file (default: input.txt)")
+    parser.add_argument("--stats", action="store_true", help="print the reductions, components and nodes visited")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    target, flag, vertex_values, vertex_list, edges = read_input(args.input)
+    graph = build_graph(vertex_list, edges)
+    stats = {}
+    solution = maximum_weight_independent_set(graph, vertex_values, stats)
+    total = sum(vertex_values[v] for v in solution)
+    if total >= int(target):
+        print(f"Found solution", end=" ")
+        print(*sorted(solution), end = " ")
+        print(f"Value: {total}")
+    else:
+        print("No solution found")
+    print(f"Maximum value: {total}")
+    if args.stats:
+        reductions = ["non-positive", "degree-0", "degree-1", "folded", "simplicial", "dominated"]
+        print("Reductions:", ", ".join(f"{name} {stats.get(name, 0)}" for name in reductions) + ".")
+        print(f"Components: {stats['components']} (largest {stats['largest component']} vertices). "
+              f"Branch-and-bound nodes: {stats.get('nodes', 0)}.")
+
+
+if __name__ == "__main__":
+    main()
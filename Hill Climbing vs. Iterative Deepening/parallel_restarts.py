@@ -0,0 +1,123 @@
+import multiprocessing
+import random
+import time
+
+from bitset_graph import BitsetGraph
+from hill_climbing import hill_climbing, random_start_state, restart_seed
+
+problem = None # Set in every worker process by set_problem, so the graph is sent once rather than with every restart
+best = None # Lowest restart known to reach error 0; the restarts after it give up at their next move
+
+
+def set_problem(shared_problem: tuple, shared_best) -> None:
+    """
+    Initializes a worker process with the problem and the shared lowest successful restart.
+
+    Args:
+        shared_problem (tuple): The list of vertices, the graph, the vertex values, the target and the BitsetGraph
+        shared_best (Value): The lowest successful restart so far (the number of restarts if there is none yet)
+    """
+    global problem, best
+    problem = shared_problem
+    best = shared_best
+
+
+class RestartStop:
+    """
+    The stop condition of one restart for hill_climbing: set once a lower restart has reached error 0. A restart
+    is never cancelled by a higher one, so the lowest successful restart always runs to the end.
+    """
+
+    def __init__(self, restart: int):
+        self.restart = restart
+        self.cancelled = False
+
+    def is_set(self) -> bool:
+        if best.value < self.restart:
+            self.cancelled = True
+        return self.cancelled
+
+
+def run_restart(task: tuple[int, str]) -> tuple[int, set | None, bool, dict[str, int]]:
+    """
+    Runs one restart in a worker process, unless a lower restart already found a solution.
+
+    Args:
+        task (tuple[int, str]): The number of the restart and its seed
+
+    Returns:
+        tuple[int, set | None, bool, dict[str, int]]: The number of the restart, the state it ended in (None if it was skipped or cancelled), whether it is a solution, and its neighbors scored and moves made
+    """
+    restart, seed = task
+    stop = RestartStop(restart)
+    stats = {}
+    if stop.is_set():
+        return restart, None, False, stats
+    stats["restarts"] = 1
+    vertex_list, graph, vertex_values, target, bits = problem
+    start_state = random_start_state(vertex_list, random.Random(seed))
+    state, found = hill_climbing(target, vertex_values, vertex_list, graph, start_state=start_state, bits=bits,
+                                 stop=stop, stats=stats)
+    if found:
+        with best.get_lock():
+            best.value = min(best.value, restart)
+    elif stop.cancelled:
+        return restart, None, False, stats
+    return restart, state, found, stats
+
+
+def parallel_random_restarts(vertex_list: list,
+                             graph: dict,
+                             vertex_values: dict,
+                             target: int,
+                             num_restarts: int,
+                             workers: int,
+                             seed: int=None,
+                             stats: dict[str, int]=None) -> set:
+    """
+    Performs hill_climbing_random_restarts with the restarts spread over a pool of processes. Restart i starts from
+    the state drawn with seed "seed:i". As soon as one restart reaches error 0 the restarts after it are cancelled,
+    and the solution is that of the lowest restart to reach error 0, so a seed always gives the same solution.
+
+    Args:
+        vertex_list (list): The list of vertices
+        graph (dict): The graph representation
+        vertex_values (dict): The values of the vertices
+        target (int): The target value
+        num_restarts (int): The number of restarts
+        workers (int): The number of worker processes
+        seed (int): The seed of the run (random if not given)
+        stats (dict[str, int]): Counters of the restarts started, neighbors scored and moves made by all the workers, updated in place
+
+    Returns:
+        set: The solution state
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+    shared_problem = (vertex_list, graph, vertex_values, target, BitsetGraph(graph, vertex_values))
+    shared_best = multiprocessing.Value("q", num_restarts)
+    tasks = [(restart, restart_seed(seed, restart)) for restart in range(num_restarts)]
+    solution = None
+    solution_restart = None
+    first_found = None # Time to the first solution to arrive, which can come from a higher restart than the one kept
+    restarts_run = 0 # Restarts that ran to the end, without being skipped or cancelled
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=set_problem, initargs=(shared_problem, shared_best)) as pool:
+        for restart, state, found, restart_stats in pool.imap_unordered(run_restart, tasks):
+            if stats is not None:
+                for key, value in restart_stats.items():
+                    stats[key] = stats.get(key, 0) + value
+            if state is not None:
+                restarts_run += 1
+            if found and first_found is None:
+                first_found = time.perf_counter() - start
+            if found and (solution_restart is None or restart < solution_restart):
+                solution, solution_restart = state, restart
+    elapsed = time.perf_counter() - start
+    if solution is None:
+        print(f"{restarts_run} restarts run with {workers} workers in {elapsed:.2f} s.")
+        print("No solution found.")
+        return None
+    print(f"Solution found by restart {solution_restart}; first solution after {first_found:.2f} s, all restarts "
+          f"done after {elapsed:.2f} s; {restarts_run} restarts run with {workers} workers (seed {seed}).")
+    return solution
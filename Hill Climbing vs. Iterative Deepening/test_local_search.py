@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from bitset_graph import BitsetGraph
+from hill_climbing import build_graph, hill_climbing, random_start_state
+from local_search import ITERATIONS_PER_VERTEX, tabu_search
+
+VALUES = [19, 11, 8, 1, 5, 11, 10, 11, 5, 20, 6, 2]
+EDGES = [(0, 3), (0, 6), (0, 9), (0, 10), (1, 2), (1, 9), (2, 3), (2, 5), (2, 6), (2, 7), (3, 4), (3, 5), (4, 8),
+         (5, 9), (5, 11), (6, 7), (6, 11), (9, 11)]
+TARGET = 52 # The best value is 57
+
+
+class TabuSearchTest(unittest.TestCase):
+    def setUp(self):
+        # A 12-vertex generated instance on which a tenure of 1 cycled until the end of its budget
+        self.vertex_list = [f"V{i:02}" for i in range(len(VALUES))]
+        self.vertex_values = dict(zip(self.vertex_list, VALUES))
+        self.graph = build_graph(self.vertex_list, [(self.vertex_list[u], self.vertex_list[v]) for u, v in EDGES])
+        self.bits = BitsetGraph(self.graph, self.vertex_values)
+
+    def test_hill_climbing_solves_quickly(self):
+        stats = {}
+        for restart in range(10):
+            start_state = random_start_state(self.vertex_list, random.Random(restart))
+            _, found = hill_climbing(TARGET, self.vertex_values, self.vertex_list, self.graph, start_state=start_state,
+                                     stats=stats)
+            if found:
+                break
+        self.assertTrue(found)
+        self.assertLess(stats["nodes"], 1000)
+
+    def test_small_graph_does_not_cycle(self):
+        budget = ITERATIONS_PER_VERTEX * len(VALUES)
+        for seed in range(20):
+            rng = random.Random(seed)
+            start_state = self.bits.to_mask(random_start_state(self.vertex_list, rng))
+            stats = {}
+            state, found = tabu_search(TARGET, self.bits, start_state, budget, rng=rng, stats=stats)
+            self.assertTrue(found)
+            self.assertGreaterEqual(self.bits.value(state), TARGET)
+            self.assertLess(stats["iterations"], budget // 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
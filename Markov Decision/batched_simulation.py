@@ -0,0 +1,121 @@
+import numpy as np
+
+from markov_decision import printStatus
+
+
+def buildTransitionTable(non_terminal_states, num_actions, samplers):
+    # Pads the alias tables of every (state, action) pair into rows of matrices, indexed by state * num_actions + action.
+    # A pair without transitions keeps the episode in the same state, as in main().
+    width = max([len(sampler[0]) for actions in samplers.values() for sampler in actions.values()] + [1])
+    next_states = np.zeros((non_terminal_states * num_actions, width), dtype=np.int64)
+    alias_probs = np.ones((non_terminal_states * num_actions, width))
+    aliases = np.zeros((non_terminal_states * num_actions, width), dtype=np.int64)
+    sizes = np.ones(non_terminal_states * num_actions, dtype=np.int64)
+    for state in range(non_terminal_states):
+        for action in range(num_actions):
+            row = state * num_actions + action
+            sampler = samplers.get(state, {}).get(action)
+            if sampler is None:
+                next_states[row, 0] = state
+                continue
+            n = len(sampler[0])
+            next_states[row, :n] = sampler[0]
+            alias_probs[row, :n] = sampler[3]
+            aliases[row, :n] = sampler[4]
+            sizes[row] = n
+    return next_states, alias_probs, aliases, sizes
+
+
+def sampleTransitions(pair, table, rng):
+    # O(1) alias-method draw of the next state for every (state, action) pair in the array
+    next_states, alias_probs, aliases, sizes = table
+    column = np.minimum((rng.random(pair.size) * sizes[pair]).astype(np.int64), sizes[pair] - 1)
+    keep = rng.random(pair.size) < alias_probs[pair, column]
+    column = np.where(keep, column, aliases[pair, column])
+    return next_states[pair, column]
+
+
+def actionProbabilities(count, total, M, reward_bounds):
+    # The distribution chooseAction samples from, for every state at once
+    non_terminal_states, num_actions = count.shape
+    probs = np.zeros((non_terminal_states, num_actions))
+    untried = (count == 0)
+    has_untried = untried.any(axis=1)
+    probs[has_untried, untried[has_untried].argmax(axis=1)] = 1.0 # The first untried action
+
+    tried = ~has_untried
+    if tried.any():
+        avg = total[tried] / count[tried] # average reward
+        bottom = np.minimum(avg.min(axis=1), reward_bounds[0])
+        top = reward_bounds[1]
+        scale = np.where(bottom == top, 1.0, top - bottom) # avoiding division by zero (set scaled avg to 1)
+        savg = np.where((bottom == top)[:, None], 1.0, 0.25 + 0.75 * ((avg - bottom[:, None]) / scale[:, None]))
+        c = count[tried].sum(axis=1)
+        # savg ** (c/M), taken in log space and scaled by the row maximum so that it cannot underflow to 0/0
+        log_up = (c / M)[:, None] * np.log(savg)
+        up = np.exp(log_up - log_up.max(axis=1, keepdims=True)) # unnormalized probabilities
+        probs[tried] = up / up.sum(axis=1, keepdims=True)
+    return probs
+
+
+def simulateBatch(num_episodes, policy, sample, action_costs, reward_of, rng):
+    # Runs num_episodes episodes side by side under a fixed policy; sample(pairs, rng) draws the next states.
+    # Returns the distinct (episode, state * num_actions + action) pairs encountered, and each episode's net reward.
+    non_terminal_states, num_actions = policy.shape
+    cum_policy = np.cumsum(policy, axis=1)
+    cum_policy[:, -1] = np.inf # Guards against the rounding of the last cumulative probability
+    state = rng.integers(0, non_terminal_states, size=num_episodes)
+    cost = np.zeros(num_episodes)
+    encountered = []
+    active = np.arange(num_episodes) # Episodes still in a non-terminal state
+    while active.size:
+        s = state[active]
+        action = (rng.random(active.size)[:, None] >= cum_policy[s]).sum(axis=1)
+        pair = s * num_actions + action
+        encountered.append(active * (non_terminal_states * num_actions) + pair)
+        cost[active] += action_costs[action]
+        state[active] = sample(pair, rng)
+        active = active[state[active] < non_terminal_states] # while in a non-terminal state
+    net_reward = reward_of[state] - cost
+    keys = np.unique(np.concatenate(encountered)) # Each pair counts once per episode
+    return keys // (non_terminal_states * num_actions), keys % (non_terminal_states * num_actions), net_reward
+
+
+def runBatched(non_terminal_states, num_actions, rounds, frequency, M, rewards, action_costs, samplers,
+               output_file, batch_size=1000, seed=None, compact=False):
+    table = buildTransitionTable(non_terminal_states, num_actions, samplers)
+    reward_of = np.zeros(max([table[0].max() + 1] + [state + 1 for state in rewards]))
+    for state, reward in rewards.items():
+        reward_of[state] = reward
+    reward_bounds = (min(rewards.values()), max(rewards.values()))
+    return runEpisodes(non_terminal_states, num_actions, rounds, frequency, M, reward_bounds, action_costs, reward_of,
+                       lambda pair, rng: sampleTransitions(pair, table, rng), output_file, batch_size, seed, compact)
+
+
+def runEpisodes(non_terminal_states, num_actions, rounds, frequency, M, reward_bounds, action_costs, reward_of, sample,
+                output_file, batch_size=1000, seed=None, compact=False, report=printStatus):
+    # Same learning rule as main(), but the policy is only refreshed between batches, so within a batch
+    # the statistics are at most batch_size episodes stale. batch_size=1 matches the one-episode loop.
+    # reward_of holds the reward of every state (0 for non-terminal ones); count and total are NumPy arrays.
+    rng = np.random.default_rng(seed)
+    action_costs = np.asarray(action_costs, dtype=float)
+    count = np.zeros((non_terminal_states, num_actions), dtype=np.int64)
+    total = np.zeros((non_terminal_states, num_actions))
+
+    done = 0
+    while done < rounds:
+        size = min(batch_size, rounds - done)
+        if frequency != 0:
+            size = min(size, frequency - done % frequency) # Batches end on the reporting rounds
+        policy = actionProbabilities(count, total, M, reward_bounds)
+        episode, pair, net_reward = simulateBatch(size, policy, sample, action_costs, reward_of, rng)
+        count += np.bincount(pair, minlength=count.size).reshape(count.shape)
+        total += np.bincount(pair, weights=net_reward[episode], minlength=total.size).reshape(total.shape)
+        done += size
+        if frequency != 0 and done % frequency == 0: # If freq param is nonzero, print output
+            report(done, non_terminal_states, num_actions, count, total, output_file, compact)
+
+    # Print final output
+    if frequency == 0 or rounds % frequency != 0:
+        report(rounds, non_terminal_states, num_actions, count, total, output_file, compact)
+    return count, total
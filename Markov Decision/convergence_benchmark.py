@@ -0,0 +1,123 @@
+import argparse
+import csv
+import random
+import statistics
+import time
+
+import numpy as np
+
+from markov_decision import STRATEGIES, LearningTables, bestActions, buildSampler, playRound
+from mdp_planning import actionValues, buildTransitionMatrices, initialValues, valueIteration
+
+
+def generateModel(non_terminal_states, terminal_states, num_actions, branching, seed):
+    # A random model in the form parseInputFile returns. Every state:action pair leads to branching next states, one
+    # of them terminal, so every policy ends its episodes and the undiscounted values are finite.
+    rng = random.Random(f"mdp:{non_terminal_states}:{terminal_states}:{num_actions}:{branching}:{seed}")
+    terminals = range(non_terminal_states, non_terminal_states + terminal_states)
+    rewards = {state: float(rng.randint(-10, 10)) for state in terminals}
+    action_costs = [round(rng.uniform(0.0, 1.0), 2) for _ in range(num_actions)]
+    transitions = {}
+    for state in range(non_terminal_states):
+        transitions[state] = {}
+        for action in range(num_actions):
+            terminal = rng.choice(terminals)
+            others = [s for s in range(non_terminal_states + terminal_states) if s != state and s != terminal]
+            next_states = [terminal] + rng.sample(others, min(branching - 1, len(others)))
+            weights = [rng.random() + 0.1 for _ in next_states]
+            transitions[state][action] = [(s, w / sum(weights)) for s, w in zip(next_states, weights)]
+    samplers = {state: {action: buildSampler(results) for action, results in actions.items()}
+                for state, actions in transitions.items()}
+    return rewards, action_costs, transitions, samplers
+
+
+def optimalActions(non_terminal_states, num_actions, rewards, action_costs, transitions, tolerance=1e-6):
+    # The set of optimal actions of every state (several when their values tie), from value iteration
+    matrices = buildTransitionMatrices(non_terminal_states, num_actions, transitions)
+    costs = np.asarray(action_costs, dtype=float)
+    _, values, _, _ = valueIteration(non_terminal_states, rewards, costs, matrices)
+    full = initialValues(non_terminal_states, rewards, matrices)
+    full[:non_terminal_states] = values
+    q = actionValues(matrices, full, costs, non_terminal_states, 1.0)
+    return [{str(a) for a in range(num_actions) if q[state, a] >= q[state].max() - tolerance}
+            for state in range(non_terminal_states)]
+
+
+def roundsToConverge(strategy, non_terminal_states, num_actions, M, rewards, action_costs, samplers, optimal,
+                     max_rounds, check_every, seed):
+    # Plays up to max_rounds rounds, checking the "Best action" line every check_every rounds. Returns the first
+    # check from which the best actions stayed optimal until the end (None if they are not optimal at the end),
+    # the number of states whose best action is optimal at the end, and the time per round.
+    tables = LearningTables(non_terminal_states, num_actions)
+    reward_bounds = (min(rewards.values()), max(rewards.values()))
+    choose = STRATEGIES[strategy]
+    rng = random.Random(seed)
+    converged_at = None
+    correct = 0
+    start = time.perf_counter()
+    for round_num in range(1, max_rounds + 1):
+        encountered, net_reward = playRound(tables, non_terminal_states, num_actions, M, reward_bounds,
+                                            rewards, action_costs, samplers, rng, choose)
+        for (state, action) in encountered:
+            tables.record(state, action, net_reward)
+        if round_num % check_every == 0:
+            best = bestActions(non_terminal_states, num_actions, tables.count, tables.total)
+            correct = sum(action in optimal[state] for state, action in enumerate(best))
+            if correct == non_terminal_states:
+                if converged_at is None:
+                    converged_at = round_num
+            else:
+                converged_at = None
+    return converged_at, correct, (time.perf_counter() - start) / max_rounds
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Rounds each exploration strategy needs to learn the optimal policy")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=sorted(STRATEGIES),
+                        help="strategies to compare (default: all)")
+    parser.add_argument("--states", type=int, default=5, help="non-terminal states of the generated models (default: 5)")
+    parser.add_argument("--terminals", type=int, default=3, help="terminal states (default: 3)")
+    parser.add_argument("--actions", type=int, default=3, help="actions (default: 3)")
+    parser.add_argument("--branching", type=int, default=3, help="next states of every state:action pair (default: 3)")
+    parser.add_argument("--models", type=int, default=10, help="number of generated models (default: 10)")
+    parser.add_argument("--M", type=int, default=10, help="hyperparameter M of the default strategy (default: 10)")
+    parser.add_argument("--max-rounds", type=int, default=20000, help="rounds played per run (default: 20000)")
+    parser.add_argument("--check-every", type=int, default=100, help="rounds between policy checks (default: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the models and the runs (default: 0)")
+    parser.add_argument("--csv", metavar="FILE", help="also write one row per run to FILE")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArguments()
+    rows = []
+    for model in range(args.models):
+        rewards, action_costs, transitions, samplers = generateModel(args.states, args.terminals, args.actions,
+                                                                     args.branching, f"{args.seed}:{model}")
+        optimal = optimalActions(args.states, args.actions, rewards, action_costs, transitions)
+        for strategy in args.strategies:
+            converged_at, correct, per_round = roundsToConverge(strategy, args.states, args.actions, args.M, rewards,
+                                                       action_costs, samplers, optimal, args.max_rounds,
+                                                       args.check_every, f"{args.seed}:{model}")
+            rows.append({"model": model, "strategy": strategy, "converged_at": converged_at, "optimal_states": correct,
+                         "us_per_round": round(per_round * 1e6, 2)})
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["model", "strategy", "converged_at", "optimal_states", "us_per_round"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    print(f"{args.models} models with {args.states} states and {args.actions} actions, up to {args.max_rounds} rounds.")
+    print(f"{'strategy':<10} {'converged':>9} {'median rounds':>14} {'optimal states':>15} {'us/round':>9}")
+    for strategy in args.strategies:
+        runs = [row for row in rows if row["strategy"] == strategy]
+        rounds = [row["converged_at"] for row in runs if row["converged_at"] is not None]
+        median = f"{statistics.median(rounds):.0f}" if rounds else "-"
+        optimal_share = sum(row["optimal_states"] for row in runs) / (len(runs) * args.states)
+        per_round = statistics.mean(row["us_per_round"] for row in runs)
+        print(f"{strategy:<10} {len(rounds):>5}/{len(runs):<3} {median:>14} {optimal_share:>15.0%} {per_round:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
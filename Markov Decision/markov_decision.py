@@ -1,4 +1,11 @@
+import argparse
+import json
+import math
+import os
+import pickle
 import random
+from array import array
+from bisect import bisect
 
 def parseInputFile(filename):
     with open(filename, "r") as f:
@@ -48,31 +55,167 @@ def parseInputFile(filename):
             results.append((next_state, prob))
         transitions[state][action] = results
 
-    return non_terminal_states, terminal_states, num_actions, rounds, frequency, M, rewards, action_costs, transitions
+    # Precompute the samplers, so that sampling a transition needs no allocation
+    samplers = {state: {action: buildSampler(results) for action, results in actions.items()}
+                for state, actions in transitions.items()}
 
+    return non_terminal_states, terminal_states, num_actions, rounds, frequency, M, rewards, action_costs, transitions, samplers
 
-def chooseAction(s, count, total, num_actions, M, rewards): # M being the hyperparameter 
-    for u in range(num_actions):
-        if count[s][u] == 0:
-            return u # choose an untried action arbitrarily
-    
-    avg = [total[s][a]/count[s][a] for a in range(num_actions)] # average reward
-    bottom = min(min(avg), min(rewards.values()))
-    top = max(rewards.values())
+
+def buildSampler(results):
+    # Returns (next states, cumulative weights, total weight, alias probabilities, aliases) for one (state, action).
+    # The cumulative weights give exactly the draws of random.choices; the alias table (Vose's method) gives O(1) draws.
+    next_states = tuple(next_s for next_s, p in results)
+    cum_weights = []
+    running = 0.0
+    for next_s, p in results:
+        running += p
+        cum_weights.append(running)
+    total = running + 0.0
+    if total <= 0.0:
+        raise ValueError(f"transition probabilities must add up to a positive number, got {results}")
+
+    n = len(results)
+    scaled = [p * n / total for next_s, p in results]
+    alias_probs = [1.0] * n
+    aliases = list(range(n))
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        alias_probs[s] = scaled[s]
+        aliases[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    return next_states, cum_weights, total, alias_probs, aliases
+
+
+def sampleNextState(sampler, rand=random.random):
+    # Same result as random.choices(next_states, weights=probs)[0] for the same random stream
+    next_states, cum_weights, total, _, _ = sampler
+    return next_states[bisect(cum_weights, rand() * total, 0, len(next_states) - 1)]
+
+
+class LearningTables:
+    # count and total, plus the per-state statistics chooseAction needs, updated as each round is recorded
+    def __init__(self, non_terminal_states, num_actions):
+        self.count = [array("q", [0] * num_actions) for _ in range(non_terminal_states)]
+        self.total = [array("d", [0.0] * num_actions) for _ in range(non_terminal_states)]
+        self.avg = [array("d", [0.0] * num_actions) for _ in range(non_terminal_states)] # total/count once tried
+        self.visits = array("q", [0] * non_terminal_states) # Sum of count over the actions of each state
+        self.untried = array("q", [num_actions] * non_terminal_states) # Number of actions with count 0
+
+    def record(self, state, action, net_reward):
+        count = self.count[state]
+        if count[action] == 0:
+            self.untried[state] -= 1
+        count[action] += 1
+        self.total[state][action] += net_reward
+        self.avg[state][action] = self.total[state][action] / count[action]
+        self.visits[state] += 1
+
+    def merge(self, count, total):
+        # Adds the counts and totals gathered elsewhere (e.g. by another process) to these tables
+        for state in range(len(count)):
+            for action in range(len(count[state])):
+                if count[state][action] == 0:
+                    continue
+                if self.count[state][action] == 0:
+                    self.untried[state] -= 1
+                self.count[state][action] += count[state][action]
+                self.total[state][action] += total[state][action]
+                self.avg[state][action] = self.total[state][action] / self.count[state][action]
+                self.visits[state] += count[state][action]
+
+
+def chooseAction(s, tables, num_actions, M, reward_bounds, rand=random.random): # M being the hyperparameter
+    if tables.untried[s]:
+        return tables.count[s].index(0) # choose an untried action arbitrarily
+
+    avg = tables.avg[s] # average reward
+    bottom, top = reward_bounds # lowest and highest terminal reward
+    for a in avg:
+        if a < bottom:
+            bottom = a
 
     if bottom == top: # avoiding divison by zero (set scaled avg to 1):
-        savg = [1.0] * num_actions 
+        savg = [1.0] * num_actions
     else:
-        savg = [0.25 + 0.75 * ((avg[i] - bottom)/(top - bottom)) for i in range(num_actions)] # average scaled to range [0.25, 1.0]
-    
-    c = sum(count[s][i] for i in range(num_actions)) 
-    up = [savg[i] ** (c/M) for i in range(num_actions)] # unnormalized probabilities
+        savg = [0.25 + 0.75 * ((a - bottom)/(top - bottom)) for a in avg] # average scaled to range [0.25, 1.0]
+
+    exponent = tables.visits[s] / M
+    up = [x ** exponent for x in savg] # unnormalized probabilities
     norm = sum(up)
-    p = [i / norm for i in up]
-    return random.choices(range(num_actions), weights=p)[0]
+    if norm == 0.0: # every weight underflowed after many visits; the same probabilities, relative to the largest
+        top_savg = max(savg)
+        up = [(x / top_savg) ** exponent for x in savg]
+        norm = sum(up)
+    # Same draw as random.choices(range(num_actions), weights=[x / norm for x in up])
+    cum_weights = []
+    running = 0.0
+    for x in up:
+        running += x / norm
+        cum_weights.append(running)
+    return bisect(cum_weights, rand() * (running + 0.0), 0, num_actions - 1)
+
+
+def unitAverages(avg, reward_bounds):
+    # Averages scaled to [0, 1], with the same bounds as chooseAction
+    bottom, top = reward_bounds
+    bottom = min(bottom, min(avg))
+    if bottom == top:
+        return [1.0] * len(avg)
+    return [(a - bottom) / (top - bottom) for a in avg]
+
+
+def chooseActionUCB1(s, tables, num_actions, M, reward_bounds, rand=random.random):
+    # UCB1: the scaled average plus sqrt(2 ln(visits) / count); deterministic, ties go to the lowest action
+    if tables.untried[s]:
+        return tables.count[s].index(0)
+    count = tables.count[s]
+    log_visits = 2.0 * math.log(tables.visits[s])
+    scores = [x + math.sqrt(log_visits / count[a]) for a, x in enumerate(unitAverages(tables.avg[s], reward_bounds))]
+    return scores.index(max(scores))
+
 
+def chooseActionThompson(s, tables, num_actions, M, reward_bounds, rand=random.random):
+    # Thompson sampling with a Gaussian posterior for each scaled average, of standard deviation 0.5 / sqrt(count)
+    # (0.5 bounds the deviation of a reward in [0, 1]). The normal draws use two uniforms each (Box-Muller), so the
+    # random stream is the same one chooseAction uses.
+    if tables.untried[s]:
+        return tables.count[s].index(0)
+    count = tables.count[s]
+    samples = []
+    for a, x in enumerate(unitAverages(tables.avg[s], reward_bounds)):
+        normal = math.sqrt(-2.0 * math.log(1.0 - rand())) * math.cos(2.0 * math.pi * rand())
+        samples.append(x + normal * 0.5 / math.sqrt(count[a]))
+    return samples.index(max(samples))
 
-def printStatus(num_rounds, non_term_states, num_actions, count, total, output_file):
+
+STRATEGIES = {"default": chooseAction, "ucb1": chooseActionUCB1, "thompson": chooseActionThompson}
+
+
+def bestActions(non_term_states, num_actions, count, total):
+    best_action = []
+    for state in range(non_term_states):
+        if any(count[state][action] == 0 for action in range(num_actions)):
+            best_action.append("U")
+        else:
+            best_action.append(str(max(range(num_actions), key=lambda a: total[state][a]/count[state][a])))
+    return best_action
+
+
+def printStatus(num_rounds, non_term_states, num_actions, count, total, output_file, compact=False):
+    if compact: # One JSON object per line instead of the text report
+        status = {"rounds": num_rounds,
+                  "count": [[int(count[state][action]) for action in range(num_actions)] for state in range(non_term_states)],
+                  "total": [[float(total[state][action]) for action in range(num_actions)] for state in range(non_term_states)],
+                  "best_action": bestActions(non_term_states, num_actions, count, total)}
+        print(json.dumps(status, separators=(",", ":")), file=output_file)
+        return
     print(f"After {num_rounds} rounds", file=output_file)
     print("Count:", file=output_file)
     for state in range(non_term_states):
@@ -86,53 +229,147 @@ def printStatus(num_rounds, non_term_states, num_actions, count, total, output_f
         for action in range(num_actions):
             line += f"[{state},{action}]={total[state][action]:.2f}. "
         print(line, file=output_file)
-    best_action = []
-    for state in range(non_term_states):
-        if any(count[state][action] == 0 for action in range(num_actions)):
-            best_action.append(f"{state}:U")
-        else:
-            best_action.append(f"{state}:{max(range(num_actions), key=lambda a: total[state][a]/count[state][a])}")
+    best_action = [f"{state}:{action}" for state, action in enumerate(bestActions(non_term_states, num_actions, count, total))]
     print("Best action: ", " ".join(best_action), file=output_file)
     print(file=output_file)
 
 
+CHECKPOINT_VERSION = 2 # 2 added the strategy and M
+
+
+def saveCheckpoint(filename, num_rounds, tables, output_offset, strategy, M):
+    # Written to a temporary file first, so a run killed while saving keeps its previous checkpoint. The strategy and
+    # M are kept so that a resumed run cannot mix the statistics of two exploration policies.
+    checkpoint = {"version": CHECKPOINT_VERSION, "rounds": num_rounds, "count": tables.count, "total": tables.total,
+                  "rng_state": random.getstate(), "output_offset": output_offset, "strategy": strategy, "M": M}
+    with open(filename + ".tmp", "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(filename + ".tmp", filename)
+
+
+def loadCheckpoint(filename, non_terminal_states, num_actions, strategy, M):
+    with open(filename, "rb") as f:
+        checkpoint = pickle.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{filename} is not a checkpoint of this program")
+    if len(checkpoint["count"]) != non_terminal_states or any(len(row) != num_actions for row in checkpoint["count"]):
+        raise ValueError(f"{filename} was written for a different input file")
+    if checkpoint["strategy"] != strategy:
+        raise ValueError(f"{filename} was written with --strategy {checkpoint['strategy']}, not {strategy}")
+    if checkpoint["M"] != M:
+        raise ValueError(f"{filename} was written with M = {checkpoint['M']}, not {M}")
+    return checkpoint
+
+
+def playRound(tables, non_terminal_states, num_actions, M, reward_bounds, rewards, action_costs, samplers, rng=random,
+              choose=chooseAction):
+    # Plays one episode from a random non-terminal state; returns the (state, action) pairs encountered and the net reward.
+    # rng is the random module by default, or a random.Random instance to keep separate streams.
+    # choose is the exploration strategy, one of STRATEGIES.
+    curr_state = rng.randint(0, non_terminal_states - 1)
+    cost = 0.0
+    encountered = {}
+    while curr_state < non_terminal_states: # while in a non-terminal state
+        action = choose(curr_state, tables, num_actions, M, reward_bounds, rng.random)
+        encountered[(curr_state, action)] = True
+        cost += action_costs[action]
+        if curr_state not in samplers or action not in samplers[curr_state]:
+            next_state = curr_state
+        else:
+            next_state = sampleNextState(samplers[curr_state][action], rng.random)
+        curr_state = next_state
+    reward = rewards.get(curr_state, 0.0)
+    return encountered.keys(), reward - cost
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Monte Carlo learning of a Markov decision process")
+    parser.add_argument("--input", default="input.txt", help="input file (default: input.txt)")
+    parser.add_argument("--output", default="output.txt", help="output file (default: output.txt)")
+    parser.add_argument("--seed", type=int, help="seed for the random number generator")
+    parser.add_argument("--batched", action="store_true", help="simulate many episodes at once with NumPy")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="with --batched, most episodes simulated before the policy is refreshed")
+    parser.add_argument("--checkpoint", metavar="FILE", help="file for periodic checkpoints of the learning state")
+    parser.add_argument("--checkpoint-every", type=int, default=100000, help="rounds between checkpoints (default: 100000)")
+    parser.add_argument("--resume", action="store_true", help="continue from the --checkpoint file")
+    parser.add_argument("--status-format", choices=["text", "json"], default="text",
+                        help="json writes each report as one compact JSON line")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes running rounds in parallel")
+    parser.add_argument("--sync-every", type=int, default=0,
+                        help="with --workers, rounds between merges of the workers' statistics (default: only at reports)")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="default",
+                        help="exploration strategy: the scaled-average rule (default), ucb1 or thompson")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if args.checkpoint and (args.batched or args.workers > 1):
+        parser.error("--checkpoint is only supported by the default single-process mode")
+    if args.batched and args.strategy != "default":
+        parser.error("--batched only supports the default strategy")
+    return args
+
+
 def main():
+    args = parseArguments()
+    if args.seed is not None:
+        random.seed(args.seed)
+
     # Parse the input file
-    filename = "input.txt"
+    filename = args.input
 
     (non_terminal_states, terminal_states, num_actions, rounds, frequency, M, 
-     rewards, action_costs, transitions) = parseInputFile(filename)
-
-    count = [[0 for _ in range(num_actions)] for _ in range(non_terminal_states)]
-    total = [[0.0 for _ in range(num_actions)] for _ in range(non_terminal_states)]
-
-    with open("output.txt", "w") as output_file:
-        for round_num in range(rounds):
-            curr_state = random.randint(0, non_terminal_states - 1)
-            cost = 0.0
-            encountered = {}
-            while curr_state < non_terminal_states: # while in a non-terminal state
-                action = chooseAction(curr_state, count, total, num_actions, M, rewards)
-                encountered[(curr_state, action)] = True
-                cost += action_costs[action]
-                if curr_state not in transitions or action not in transitions[curr_state]:
-                    next_state = curr_state
-                else:
-                    results = transitions[curr_state][action]
-                    next_state = random.choices([next_s for next_s, p in results], weights=[p for next_s, p in results])[0]
-                curr_state = next_state
-            reward = rewards.get(curr_state, 0.0)
-            net_reward = reward - cost
-            for (state, action) in encountered.keys():
-                count[state][action] += 1
-                total[state][action] += net_reward
+     rewards, action_costs, transitions, samplers) = parseInputFile(filename)
+
+    if args.batched:
+        from batched_simulation import runBatched # NumPy is only needed for this mode
+        with open(args.output, "w") as output_file:
+            runBatched(non_terminal_states, num_actions, rounds, frequency, M, rewards, action_costs, samplers,
+                       output_file, args.batch_size, args.seed, args.status_format == "json")
+        return
+
+    if args.workers > 1:
+        from parallel_simulation import runParallel
+        with open(args.output, "w") as output_file:
+            runParallel(non_terminal_states, num_actions, rounds, frequency, M, rewards, action_costs, samplers,
+                        output_file, args.workers, args.sync_every, args.seed, args.status_format == "json",
+                        args.strategy)
+        return
+
+    tables = LearningTables(non_terminal_states, num_actions)
+    reward_bounds = (min(rewards.values()), max(rewards.values()))
+    compact = (args.status_format == "json")
+    choose = STRATEGIES[args.strategy]
+
+    start_round = 0
+    if args.resume:
+        checkpoint = loadCheckpoint(args.checkpoint, non_terminal_states, num_actions, args.strategy, M)
+        tables.merge(checkpoint["count"], checkpoint["total"])
+        random.setstate(checkpoint["rng_state"])
+        start_round = checkpoint["rounds"]
+
+    with open(args.output, "r+" if args.resume else "w") as output_file:
+        if args.resume: # Drop whatever was reported after the checkpoint; it is about to be reported again
+            output_file.seek(checkpoint["output_offset"])
+            output_file.truncate()
+        for round_num in range(start_round, rounds):
+            encountered, net_reward = playRound(tables, non_terminal_states, num_actions, M, reward_bounds,
+                                                rewards, action_costs, samplers, choose=choose)
+            for (state, action) in encountered:
+                tables.record(state, action, net_reward)
             
             if frequency != 0 and (round_num + 1) % frequency == 0: # If freq param is nonzero, print output
-                printStatus(round_num + 1, non_terminal_states, num_actions, count, total, output_file)
+                printStatus(round_num + 1, non_terminal_states, num_actions, tables.count, tables.total, output_file, compact)
+
+            if args.checkpoint and (round_num + 1) % args.checkpoint_every == 0:
+                output_file.flush()
+                saveCheckpoint(args.checkpoint, round_num + 1, tables, output_file.tell(), args.strategy, M)
             
         # Print final output
         if frequency == 0 or rounds % frequency != 0:
-            printStatus(rounds, non_terminal_states, num_actions, count, total, output_file)
+            printStatus(rounds, non_terminal_states, num_actions, tables.count, tables.total, output_file, compact)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+import argparse
+
+import numpy as np
+
+from markov_decision import parseInputFile
+
+
+def buildTransitionMatrices(non_terminal_states, num_actions, transitions):
+    # One sparse matrix per action in CSR form (indptr, indices, data), with a row per non-terminal state.
+    # Probabilities are normalized by their sum, as in sampling; a missing (state, action) is a self-loop.
+    matrices = []
+    for action in range(num_actions):
+        indptr = [0]
+        indices = []
+        data = []
+        for state in range(non_terminal_states):
+            results = transitions.get(state, {}).get(action)
+            if not results:
+                results = [(state, 1.0)]
+            total = sum(p for _, p in results)
+            for next_s, p in results:
+                indices.append(next_s)
+                data.append(p / total)
+            indptr.append(len(indices))
+        indptr = np.array(indptr, dtype=np.int64)
+        rows = np.repeat(np.arange(non_terminal_states), np.diff(indptr)) # Row of every stored entry
+        matrices.append((indptr, np.array(indices, dtype=np.int64), np.array(data), rows))
+    return matrices
+
+
+def expectedValues(matrix, values, non_terminal_states):
+    # Sparse matrix-vector product: the expected value of the next state, for every non-terminal state
+    _, indices, data, rows = matrix
+    return np.bincount(rows, weights=data * values[indices], minlength=non_terminal_states)
+
+
+def actionValues(matrices, values, action_costs, non_terminal_states, discount):
+    # Q[s, a]: pay the cost of a, then collect the (discounted) value of wherever it leads
+    return np.stack([-action_costs[action] + discount * expectedValues(matrix, values, non_terminal_states)
+                     for action, matrix in enumerate(matrices)], axis=1)
+
+
+def initialValues(non_terminal_states, rewards, matrices):
+    num_states = max([non_terminal_states] + [state + 1 for state in rewards] +
+                     [int(matrix[1].max()) + 1 for matrix in matrices if matrix[1].size])
+    values = np.zeros(num_states)
+    for state, reward in rewards.items():
+        values[state] = reward # Terminal states are worth their reward
+    return values
+
+
+def valueIteration(non_terminal_states, rewards, action_costs, matrices, tolerance=1e-9, max_iterations=100000,
+                   discount=1.0):
+    values = initialValues(non_terminal_states, rewards, matrices)
+    change = np.inf
+    iterations = 0
+    while change > tolerance and iterations < max_iterations:
+        updated = actionValues(matrices, values, action_costs, non_terminal_states, discount).max(axis=1)
+        change = np.abs(updated - values[:non_terminal_states]).max(initial=0.0)
+        values[:non_terminal_states] = updated
+        iterations += 1
+    q = actionValues(matrices, values, action_costs, non_terminal_states, discount)
+    return q.argmax(axis=1), values[:non_terminal_states], iterations, change
+
+
+def policyIteration(non_terminal_states, rewards, action_costs, matrices, tolerance=1e-9, max_iterations=100000,
+                    discount=1.0):
+    # Policy evaluation is iterative on the sparse rows, so no dense system is ever formed
+    values = initialValues(non_terminal_states, rewards, matrices)
+    policy = actionValues(matrices, values, action_costs, non_terminal_states, discount).argmax(axis=1)
+    states = np.arange(non_terminal_states)
+    iterations = 0
+    change = np.inf
+    while iterations < max_iterations:
+        change = np.inf
+        while change > tolerance and iterations < max_iterations: # Evaluate the current policy
+            updated = actionValues(matrices, values, action_costs, non_terminal_states, discount)[states, policy]
+            change = np.abs(updated - values[:non_terminal_states]).max(initial=0.0)
+            values[:non_terminal_states] = updated
+            iterations += 1
+        q = actionValues(matrices, values, action_costs, non_terminal_states, discount)
+        # Keep the current action unless another one is strictly better, so that ties cannot cycle
+        improved = np.where(q.max(axis=1) > q[states, policy] + tolerance, q.argmax(axis=1), policy)
+        if np.array_equal(improved, policy):
+            break
+        policy = improved
+    return policy, values[:non_terminal_states], iterations, change
+
+
+def learnedBestActions(filename):
+    # The last "Best action" line that markov_decision.py wrote, as {state: action or "U"}
+    best = None
+    with open(filename, "r") as f:
+        for line in f:
+            if line.startswith("Best action:"):
+                best = line
+    if best is None:
+        raise ValueError(f"no \"Best action\" line in {filename}")
+    pairs = (token.split(":") for token in best[len("Best action:"):].split())
+    return {int(state): action for state, action in pairs}
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Exact planning for the markov_decision.py input format")
+    parser.add_argument("--input", default="input.txt", help="input file (default: input.txt)")
+    parser.add_argument("--method", choices=["value", "policy"], default="value", help="value or policy iteration")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="stop when no value changes by more than this")
+    parser.add_argument("--max-iterations", type=int, default=100000, help="upper limit on the number of sweeps")
+    parser.add_argument("--discount", type=float, default=1.0, help="discount factor (1.0 matches the simulation)")
+    parser.add_argument("--check", metavar="FILE", help="compare with the last \"Best action\" line of a learning run")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArguments()
+    (non_terminal_states, terminal_states, num_actions, rounds, frequency, M,
+     rewards, action_costs, transitions, samplers) = parseInputFile(args.input)
+    matrices = buildTransitionMatrices(non_terminal_states, num_actions, transitions)
+    solve = valueIteration if args.method == "value" else policyIteration
+    policy, values, iterations, change = solve(non_terminal_states, rewards, np.asarray(action_costs, dtype=float),
+                                               matrices, args.tolerance, args.max_iterations, args.discount)
+
+    status = "converged" if change <= args.tolerance else "stopped without converging"
+    print(f"{args.method.capitalize()} iteration {status} after {iterations} iterations (last change {change:.3g}).")
+    print("Values: ", " ".join(f"{state}:{values[state]:.2f}" for state in range(non_terminal_states)))
+    print("Best action: ", " ".join(f"{state}:{policy[state]}" for state in range(non_terminal_states)))
+
+    if args.check:
+        learned = learnedBestActions(args.check)
+        disagree = [state for state in range(non_terminal_states) if learned.get(state) != str(policy[state])]
+        print(f"Learned policy agrees on {non_terminal_states - len(disagree)} of {non_terminal_states} states.", end="")
+        print(f" Differs at: {' '.join(map(str, disagree))}" if disagree else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import multiprocessing
+import random
+import time
+
+from markov_decision import STRATEGIES, LearningTables, playRound, printStatus
+
+model = None # Set in every worker process by setModel, so the model is sent once rather than with every block
+
+
+def setModel(shared_model):
+    global model
+    model = shared_model
+
+
+def workerSeed(seed, epoch, worker):
+    # String seeds are hashed with SHA-512 by random.Random, so the derived streams are the same on every run
+    return f"{seed}:{epoch}:{worker}"
+
+
+def runBlock(task):
+    # Plays a block of rounds starting from a snapshot of the merged statistics; returns only what this block added
+    count, total, num_rounds, seed = task
+    non_terminal_states, num_actions, M, rewards, action_costs, samplers, strategy = model
+    tables = LearningTables(non_terminal_states, num_actions)
+    tables.merge(count, total)
+    reward_bounds = (min(rewards.values()), max(rewards.values()))
+    added_count = [[0] * num_actions for _ in range(non_terminal_states)]
+    added_total = [[0.0] * num_actions for _ in range(non_terminal_states)]
+    rng = random.Random(seed)
+    for _ in range(num_rounds):
+        encountered, net_reward = playRound(tables, non_terminal_states, num_actions, M, reward_bounds,
+                                            rewards, action_costs, samplers, rng, STRATEGIES[strategy])
+        for (state, action) in encountered:
+            tables.record(state, action, net_reward)
+            added_count[state][action] += 1
+            added_total[state][action] += net_reward
+    return added_count, added_total
+
+
+def runParallel(non_terminal_states, num_actions, rounds, frequency, M, rewards, action_costs, samplers,
+                output_file, workers, sync_every=0, seed=None, compact=False, strategy="default"):
+    # Rounds are played in epochs. In each epoch every worker runs its share of the rounds from the same merged
+    # statistics, with its own derived seed; the additions are then merged in worker order. Epochs end at every
+    # report and, if sync_every is set, every sync_every rounds, which is how the workers share what they learned.
+    if seed is None:
+        seed = random.randrange(2**32)
+    tables = LearningTables(non_terminal_states, num_actions)
+    shared_model = (non_terminal_states, num_actions, M, rewards, action_costs, samplers, strategy)
+    start = time.perf_counter()
+    done = 0
+    epoch = 0
+    with multiprocessing.Pool(workers, initializer=setModel, initargs=(shared_model,)) as pool:
+        while done < rounds:
+            size = rounds - done
+            if sync_every > 0:
+                size = min(size, sync_every)
+            if frequency != 0:
+                size = min(size, frequency - done % frequency) # Epochs end on the reporting rounds
+            count = [list(row) for row in tables.count]
+            total = [list(row) for row in tables.total]
+            tasks = [(count, total, size // workers + (1 if w < size % workers else 0), workerSeed(seed, epoch, w))
+                     for w in range(workers)]
+            for added_count, added_total in pool.map(runBlock, tasks):
+                tables.merge(added_count, added_total)
+            done += size
+            epoch += 1
+            if frequency != 0 and done % frequency == 0: # If freq param is nonzero, print output
+                printStatus(done, non_terminal_states, num_actions, tables.count, tables.total, output_file, compact)
+
+    # Print final output
+    if frequency == 0 or rounds % frequency != 0:
+        printStatus(rounds, non_terminal_states, num_actions, tables.count, tables.total, output_file, compact)
+    elapsed = time.perf_counter() - start
+    print(f"{rounds} rounds in {elapsed:.2f} s with {workers} workers ({rounds / elapsed:.0f} rounds/sec).")
+    return tables
@@ -0,0 +1,183 @@
+import argparse
+import json
+from array import array
+
+import numpy as np
+
+from batched_simulation import runEpisodes
+
+MODEL_VERSION = 1
+
+
+class SparseModel:
+    # The whole input file in flat arrays. Transitions are in CSR form with one row per (state, action) pair,
+    # indexed by state * num_actions + action: the next states of pair p are indices[indptr[p]:indptr[p + 1]].
+    def __init__(self, params, reward_states, reward_values, action_costs, indptr, indices, probs):
+        (self.non_terminal_states, self.terminal_states, self.num_actions,
+         self.rounds, self.frequency, self.M) = (int(x) for x in params)
+        self.reward_states = np.asarray(reward_states, dtype=np.int64)
+        self.reward_values = np.asarray(reward_values, dtype=float)
+        self.action_costs = np.asarray(action_costs, dtype=float)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.probs = np.asarray(probs, dtype=float)
+        # Cumulative probabilities within each row, offset by the row number, so that one searchsorted over the
+        # whole array samples every pair at once. The last entry of row p is exactly p + 1.
+        row = np.repeat(np.arange(self.indptr.size - 1), np.diff(self.indptr))
+        cum = np.cumsum(self.probs)
+        row_start = np.concatenate(([0.0], cum))[self.indptr[:-1]]
+        self.cum = row + (cum - row_start[row])
+        self.cum[self.indptr[1:] - 1] = np.arange(1, self.indptr.size)
+
+    def params(self):
+        return (self.non_terminal_states, self.terminal_states, self.num_actions, self.rounds, self.frequency, self.M)
+
+    def rewardArray(self):
+        # Reward of every state that can be reached, 0 for the non-terminal ones
+        size = max(self.non_terminal_states + self.terminal_states, int(self.indices.max(initial=-1)) + 1,
+                   int(self.reward_states.max(initial=-1)) + 1)
+        reward_of = np.zeros(size)
+        reward_of[self.reward_states] = self.reward_values
+        return reward_of
+
+    def rewardBounds(self):
+        return float(self.reward_values.min()), float(self.reward_values.max())
+
+    def sample(self, pair, rng):
+        # Next state for every (state, action) pair in the array, drawn by inverse CDF in O(log nnz)
+        position = np.searchsorted(self.cum, pair + rng.random(pair.size), side="right")
+        return self.indices[position]
+
+
+def parseModel(filename):
+    # Streams the input file line by line into flat arrays, so memory is proportional to the number of
+    # transitions rather than to the text. A repeated "state:action" line replaces the earlier one, as in
+    # parseInputFile, and a pair without transitions stays in the same state. Lines for a terminal state or an
+    # action past num_actions are skipped, since the simulation never uses them.
+    with open(filename, "r") as f:
+        lines = (line for line in f if line.strip())
+        params = [int(x) for x in next(lines).split()[:6]]
+        non_terminal_states, num_actions = params[0], params[2]
+
+        tokens = next(lines).split()
+        reward_states = [int(x) for x in tokens[0::2]]
+        reward_values = [float(x) for x in tokens[1::2]]
+
+        tokens = next(lines).split()
+        action_costs = np.zeros(num_actions)
+        action_costs[[int(x) for x in tokens[0::2]]] = [float(x) for x in tokens[1::2]]
+
+        pair_of_line = array("q")
+        line_start = array("q")
+        next_states = array("q")
+        probs = array("d")
+        for line in lines:
+            parts = line.split()
+            if ":" not in parts[0]:
+                continue
+            state_string, action_string = parts[0].split(":")
+            state, action = int(state_string), int(action_string)
+            if not (0 <= state < non_terminal_states and 0 <= action < num_actions):
+                continue
+            pair_of_line.append(state * num_actions + action)
+            line_start.append(len(next_states))
+            next_states.extend(map(int, parts[1::2]))
+            probs.extend(map(float, parts[2::2]))
+
+    num_pairs = non_terminal_states * num_actions
+    line_start = np.append(np.frombuffer(line_start, dtype=np.int64), len(next_states))
+    line_of_pair = np.full(num_pairs, -1, dtype=np.int64)
+    line_of_pair[np.frombuffer(pair_of_line, dtype=np.int64)] = np.arange(len(pair_of_line)) # The last line wins
+    present = line_of_pair >= 0
+    start = np.where(present, line_start[:-1][np.maximum(line_of_pair, 0)], 0)
+    length = np.where(present, line_start[1:][np.maximum(line_of_pair, 0)] - start, 0)
+    present &= length > 0
+    length[~present] = 1 # Room for the self-loop
+
+    indptr = np.concatenate(([0], np.cumsum(length)))
+    source = np.repeat(start - indptr[:-1], length) + np.arange(indptr[-1])
+    indices = np.frombuffer(next_states, dtype=np.int64)[np.where(np.repeat(present, length), source, 0)]
+    data = np.frombuffer(probs, dtype=float)[np.where(np.repeat(present, length), source, 0)]
+    missing = indptr[:-1][~present]
+    indices[missing] = np.flatnonzero(~present) // num_actions
+    data[missing] = 1.0
+
+    row_total = np.add.reduceat(data, indptr[:-1])
+    if (row_total <= 0).any():
+        pair = int(np.flatnonzero(row_total <= 0)[0])
+        raise ValueError(f"transition {pair // num_actions}:{pair % num_actions} has no positive probability")
+    data /= np.repeat(row_total, length) # Normalized by their sum, as in sampling
+    return SparseModel(params, reward_states, reward_values, action_costs, indptr, indices, data)
+
+
+def saveModel(filename, model):
+    # NumPy .npz archive; loading it skips the text parsing entirely
+    with open(filename, "wb") as f:
+        np.savez(f, version=MODEL_VERSION, params=np.array(model.params(), dtype=np.int64),
+                 reward_states=model.reward_states, reward_values=model.reward_values,
+                 action_costs=model.action_costs, indptr=model.indptr, indices=model.indices, probs=model.probs)
+
+
+def loadModel(filename):
+    with np.load(filename) as archive:
+        if int(archive["version"]) != MODEL_VERSION:
+            raise ValueError(f"{filename} is not a version {MODEL_VERSION} model")
+        return SparseModel(archive["params"], archive["reward_states"], archive["reward_values"],
+                           archive["action_costs"], archive["indptr"], archive["indices"], archive["probs"])
+
+
+def bestActionArray(count, total):
+    # bestActions for count/total arrays: "U" while a state has an untried action, otherwise the first best average
+    average = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+    best = average.argmax(axis=1).astype(str).astype(object)
+    best[(count == 0).any(axis=1)] = "U"
+    return best.tolist()
+
+
+def printArrayStatus(num_rounds, non_term_states, num_actions, count, total, output_file, compact=False):
+    # Same report as printStatus, formatted from the arrays without indexing them element by element
+    best_action = bestActionArray(count, total)
+    if compact:
+        status = {"rounds": num_rounds, "count": count.tolist(), "total": total.tolist(), "best_action": best_action}
+        print(json.dumps(status, separators=(",", ":")), file=output_file)
+        return
+    actions = range(num_actions)
+    print(f"After {num_rounds} rounds", file=output_file)
+    print("Count:", file=output_file)
+    for state, row in enumerate(count.tolist()):
+        print("".join([f"[{state},{action}]={row[action]}. " for action in actions]), file=output_file)
+    print("Total:", file=output_file)
+    for state, row in enumerate(total.tolist()):
+        print("".join([f"[{state},{action}]={row[action]:.2f}. " for action in actions]), file=output_file)
+    print("Best action: ", " ".join(f"{state}:{action}" for state, action in enumerate(best_action)), file=output_file)
+    print(file=output_file)
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Batched simulation of large models kept in flat arrays")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", default="input.txt", help="input file (default: input.txt)")
+    source.add_argument("--load-model", metavar="FILE", help="read a model written by --save-model instead")
+    parser.add_argument("--save-model", metavar="FILE", help="write the parsed model in binary form")
+    parser.add_argument("--output", default="output.txt", help="output file (default: output.txt)")
+    parser.add_argument("--rounds", type=int, help="number of rounds (default: from the model)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="episodes simulated between policy updates")
+    parser.add_argument("--seed", type=int, help="seed for the random number generator")
+    parser.add_argument("--status-format", choices=["text", "json"], default="text", help="format of each report")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArguments()
+    model = loadModel(args.load_model) if args.load_model else parseModel(args.input)
+    if args.save_model:
+        saveModel(args.save_model, model)
+    rounds = args.rounds if args.rounds is not None else model.rounds
+    with open(args.output, "w") as output_file:
+        runEpisodes(model.non_terminal_states, model.num_actions, rounds, model.frequency, model.M,
+                    model.rewardBounds(), model.action_costs, model.rewardArray(), model.sample, output_file,
+                    args.batch_size, args.seed, args.status_format == "json", report=printArrayStatus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import random
+import tempfile
+import unittest
+
+from markov_decision import LearningTables, chooseAction, loadCheckpoint, saveCheckpoint
+
+
+class ChooseActionTest(unittest.TestCase):
+    def tables(self, visits, averages):
+        # One state whose actions have the given averages, visits spread evenly over them
+        tables = LearningTables(1, len(averages))
+        for action, average in enumerate(averages):
+            for _ in range(visits // len(averages)):
+                tables.record(0, action, average)
+        return tables
+
+    def test_underflow(self):
+        # visits / M = 10000: every scaled average below 1 raised to that power is 0.0
+        tables = self.tables(10000, [0.0, 0.5])
+        self.assertEqual(sum(x ** (10000 / 1) for x in [0.25, 0.625]), 0.0)
+        rng = random.Random(0)
+        actions = {chooseAction(0, tables, 2, 1, (0.0, 1.0), rng.random) for _ in range(100)}
+        self.assertEqual(actions, {1})
+
+    def test_no_underflow_unchanged(self):
+        # Without underflow the draw is still the one of random.choices over the normalized weights
+        tables = self.tables(20, [0.0, 0.5])
+        weights = [x ** (20 / 10) for x in [0.25, 0.625]]
+        expected = random.Random(1)
+        rng = random.Random(1)
+        for _ in range(100):
+            self.assertEqual(chooseAction(0, tables, 2, 10, (0.0, 1.0), rng.random),
+                             expected.choices(range(2), weights=[x / sum(weights) for x in weights])[0])
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "run.ckpt")
+        saveCheckpoint(self.filename, 100, LearningTables(2, 3), 0, "ucb1", 10)
+
+    def test_same_strategy(self):
+        self.assertEqual(loadCheckpoint(self.filename, 2, 3, "ucb1", 10)["rounds"], 100)
+
+    def test_other_strategy(self):
+        with self.assertRaisesRegex(ValueError, "--strategy ucb1"):
+            loadCheckpoint(self.filename, 2, 3, "thompson", 10)
+
+    def test_other_M(self):
+        with self.assertRaisesRegex(ValueError, "M = 10"):
+            loadCheckpoint(self.filename, 2, 3, "ucb1", 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import json
+import queue
+import sys
+import threading
+from collections import OrderedDict
+
+from text_classification import (buildModel, calculateProbabilities, countingStream, iterCorpus, loadModel,
+                                 modelTokenizer, posteriorFromRows)
+
+
+class PosteriorCache:
+    # LRU cache of posterior maps, keyed by a hash of the document's normalized token ids
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        posterior_probs = self.entries.get(key)
+        if posterior_probs is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return posterior_probs
+
+    def put(self, key, posterior_probs):
+        if self.max_size <= 0:
+            return
+        self.entries[key] = posterior_probs
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False) # Evict the least recently used
+
+
+def readRequests(stream, requests):
+    # Runs in its own thread so the main loop can gather whatever has arrived into one batch
+    for line in stream:
+        if line.strip():
+            requests.put(line)
+    requests.put(None) # End of input
+
+
+def nextBatch(requests, batch_size, batch_wait):
+    # Blocks for the first request, then waits at most batch_wait seconds for more
+    first = requests.get()
+    if first is None:
+        return None
+    batch = [first]
+    while len(batch) < batch_size:
+        try:
+            line = requests.get(timeout=batch_wait)
+        except queue.Empty:
+            break
+        if line is None:
+            requests.put(None) # Let the next call see the end of input after this batch
+            break
+        batch.append(line)
+    return batch
+
+
+def scoreBatch(batch, model, tokenizer, cache):
+    responses = []
+    pending = {} # Documents repeated within the batch are scored once
+    for line in batch:
+        try:
+            request = json.loads(line)
+            text = request["text"]
+            if not isinstance(text, str):
+                raise TypeError(f"\"text\" must be a string, not {type(text).__name__}")
+        except (ValueError, KeyError, TypeError) as e:
+            responses.append({"error": f"bad request: {e}"})
+            continue
+        rows = tokenizer.encode(text)
+        key = hashlib.blake2b(rows.tobytes(), digest_size=16).digest()
+        posterior_probs = pending.get(key)
+        if posterior_probs is None:
+            posterior_probs = cache.get(key)
+            if posterior_probs is None:
+                posterior_probs = posteriorFromRows(rows, model)
+                cache.put(key, posterior_probs)
+            pending[key] = posterior_probs
+        response = {"prediction": max(posterior_probs, key=posterior_probs.get), "posteriors": posterior_probs}
+        if "id" in request:
+            response = {"id": request["id"], **response}
+        responses.append(response)
+    return responses
+
+
+def serve(model, input_stream, output_stream, batch_size=64, batch_wait=0.005, cache_size=10000):
+    tokenizer = modelTokenizer(model)
+    cache = PosteriorCache(cache_size)
+    requests = queue.Queue()
+    threading.Thread(target=readRequests, args=(input_stream, requests), daemon=True).start()
+    while True:
+        batch = nextBatch(requests, batch_size, batch_wait)
+        if batch is None:
+            break
+        for response in scoreBatch(batch, model, tokenizer, cache):
+            output_stream.write(json.dumps(response) + "\n")
+        output_stream.flush() # One flush per batch rather than per document
+    return cache
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Resident biography classifier reading JSON lines from stdin")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--model", metavar="FILE", help="model written by text_classification.py --save-model")
+    source.add_argument("--corpus", metavar="FILE", help="train on this corpus at startup instead")
+    parser.add_argument("--num-entries", type=int, help="number of leading corpus entries used for training (default: all)")
+    parser.add_argument("--epsilon", type=float, help="smoothing parameter when training from --corpus (default: 0.1)")
+    parser.add_argument("--batch-size", type=int, default=64, help="largest number of requests handled as one batch")
+    parser.add_argument("--batch-wait", type=float, default=0.005, help="seconds to wait for more documents to fill a batch")
+    parser.add_argument("--cache-size", type=int, default=10000, help="number of posterior maps kept in the LRU cache")
+    args = parser.parse_args()
+    if args.model and (args.num_entries is not None or args.epsilon is not None):
+        parser.error("--num-entries and --epsilon only apply to --corpus, not to --model")
+    if args.epsilon is None:
+        args.epsilon = 0.1
+    return args
+
+
+def main():
+    args = parseArguments()
+    if args.model:
+        model = loadModel(args.model)
+    else:
+        num_entries = args.num_entries if args.num_entries is not None else sys.maxsize
+        Occ_T_c, Occ_T_wc = countingStream(iterCorpus(args.corpus), num_entries)
+        model = buildModel(*calculateProbabilities(Occ_T_c, Occ_T_wc, args.epsilon))
+    cache = serve(model, sys.stdin, sys.stdout, args.batch_size, args.batch_wait, args.cache_size)
+    print(f"Cache hits: {cache.hits}. Misses: {cache.misses}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
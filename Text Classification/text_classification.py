@@ -1,5 +1,13 @@
+import argparse
+import functools
+import itertools
 import math
-import sys
+import mmap
+import multiprocessing
+import operator
+import struct
+import zlib
+from array import array
 
 STOPWORDS = set("""
 about all along also although among and any anyone anything are around because 
@@ -16,32 +24,28 @@ twenty thirty forty fifty sixty seventy eighty ninety hundred hundreds
 thousand thousands million millions
 """.split())
 
-def parseInputFile(filename):
+def iterCorpus(filename):
+    # Yields (name, category, text) one biography at a time, so the file is never held in memory
     with open(filename, "r") as f:
-        lines = [line.strip() for line in f]
-    
-    # Need to parse the corpus
-    i = 0
-    corpus = []
-    while i < len(lines):
-        while i < len(lines) and not lines[i]: # Skipping the empty lines
-            i += 1
-        if i >= len(lines): # End of file
-            break
-        # Get the name of person first
-        name = lines[i].strip()
-        i += 1
-        # Line below is the category
-        category = lines[i].strip()
-        i += 1
-        # Line(s) below involves the text
-        text = [] 
-        while i < len(lines) and lines[i]:
-            text.append(lines[i])
-            i += 1
-        text = " ".join(text)
-        corpus.append((name, category, text))
-    return corpus
+        lines = (line.strip() for line in f)
+        for line in lines:
+            if not line: # Skipping the empty lines
+                continue
+            # Get the name of person first
+            name = line
+            # Line below is the category
+            category = next(lines, "")
+            # Line(s) below involves the text
+            text = []
+            for line in lines:
+                if not line:
+                    break
+                text.append(line)
+            yield name, category, " ".join(text)
+
+
+def parseInputFile(filename):
+    return list(iterCorpus(filename))
 
 
 def normalizeText(corpus):
@@ -53,26 +57,187 @@ def normalizeText(corpus):
     return text
 
 
-def counting(corpus, num_entries):
-    training_corpus = corpus[:num_entries]
+class Tokenizer:
+    # Fast path for normalizeText: every distinct raw token is normalized once and interned to an integer id.
+    # A frozen tokenizer never grows; tokens outside its vocabulary are skipped.
+    def __init__(self, words=(), frozen=False):
+        self.words = [] # id -> normalized token
+        self.ids = {} # normalized token -> id
+        self.dropped = bytearray() # dropped[id] is 1 for stopwords and tokens of two characters or less
+        self.raw_ids = {} # raw token -> id, so repeated tokens skip lower() and strip()
+        self.frozen = False
+        for word in words:
+            self.intern(word)
+        self.frozen = frozen
+
+    def intern(self, token):
+        i = self.ids.get(token)
+        if i is None:
+            if self.frozen:
+                return -1
+            i = len(self.words)
+            self.ids[token] = i
+            self.words.append(token)
+            self.dropped.append(len(token) <= 2 or token in STOPWORDS)
+        return i
+
+    def encode(self, text):
+        # Returns the ids of the tokens normalizeText would keep, in the same order
+        ids = array("i")
+        raw_ids = self.raw_ids
+        dropped = self.dropped
+        for raw in text.split():
+            i = raw_ids.get(raw)
+            if i is None:
+                i = self.intern(raw.lower().strip(".,"))
+                if i < 0:
+                    continue # Not cached, so a frozen tokenizer stays bounded by its vocabulary
+                raw_ids[raw] = i
+            if not dropped[i]:
+                ids.append(i)
+        return ids
+
+
+class HashedFeatures:
+    # Bounded-memory alternative to a vocabulary: every normalized token is hashed into one of num_buckets rows.
+    # Rows with known[row] == 0 (never seen in training, or pruned) are skipped like unknown words.
+    def __init__(self, num_buckets):
+        self.num_buckets = num_buckets
+        self.known = bytearray(num_buckets)
+
+    def bucket(self, word):
+        return zlib.crc32(word.encode("utf-8")) % self.num_buckets # Stable across runs, unlike hash()
+
+    def encode(self, text):
+        rows = array("i")
+        for word in normalizeText(text):
+            b = self.bucket(word)
+            if self.known[b]:
+                rows.append(b)
+        return rows
+
+
+def updateCounts(Occ_T_c, Occ_T_wc, category, text):
+    # Online training step: adds one biography to the counts
+    Occ_T_c[category] = Occ_T_c.get(category, 0) + 1
+    words = normalizeText(text)
+    for word in words:
+        if word not in Occ_T_wc:
+            Occ_T_wc[word] = {}
+        Occ_T_wc[word][category] = Occ_T_wc[word].get(category, 0) + 1
+
+
+def countingStream(records, num_entries):
+    # Same counts as counting, but consumes only the first num_entries records of an iterator
     Occ_T_c = {} # Number of biographies of category C in the training corpus
     Occ_T_wc = {} # Number of biographies of category C containing word w in the training corpus
+    for _, category, text in itertools.islice(records, num_entries):
+        updateCounts(Occ_T_c, Occ_T_wc, category, text)
+    return Occ_T_c, Occ_T_wc
+
 
-    for _, category, text in training_corpus:
+def counting(corpus, num_entries):
+    return countingStream(iter(corpus), num_entries)
+
+
+def countingFast(records, num_entries, tokenizer):
+    # Same counts as countingStream, accumulated in per-category lists indexed by token id
+    Occ_T_c = {}
+    category_rows = {}
+    for _, category, text in itertools.islice(records, num_entries):
         Occ_T_c[category] = Occ_T_c.get(category, 0) + 1
-        words = normalizeText(text)
-        for word in words:
-            if word not in Occ_T_wc:
-                Occ_T_wc[word] = {}
-            Occ_T_wc[word][category] = Occ_T_wc[word].get(category, 0) + 1
-    
+        row = category_rows.setdefault(category, [])
+        ids = tokenizer.encode(text)
+        if len(row) < len(tokenizer.words):
+            row.extend([0] * (len(tokenizer.words) - len(row)))
+        for i in ids:
+            row[i] += 1
+
+    # Ids follow first appearance, so the words come out in the same order as in countingStream
+    Occ_T_wc = {}
+    for i, word in enumerate(tokenizer.words):
+        for category, row in category_rows.items():
+            if i < len(row) and row[i]:
+                if word not in Occ_T_wc:
+                    Occ_T_wc[word] = {}
+                Occ_T_wc[word][category] = row[i]
+    return Occ_T_c, Occ_T_wc
+
+
+def countingHashed(records, num_entries, features, min_count=1):
+    # Counts into one dense row of num_buckets per category, so memory does not grow with the vocabulary
+    Occ_T_c = {}
+    category_rows = {}
+    for _, category, text in itertools.islice(records, num_entries):
+        Occ_T_c[category] = Occ_T_c.get(category, 0) + 1
+        if category not in category_rows:
+            category_rows[category] = array("i", bytes(4 * features.num_buckets))
+        row = category_rows[category]
+        for word in normalizeText(text):
+            row[features.bucket(word)] += 1
+
+    # Buckets seen fewer than min_count times in total are pruned (rare words, when nothing collides)
+    for b, counts in enumerate(zip(*category_rows.values())):
+        features.known[b] = sum(counts) >= min_count
+    return Occ_T_c, category_rows
+
+
+def pruneRareWords(Occ_T_wc, min_count):
+    # Exact-vocabulary counterpart of the min_count pruning in countingHashed
+    return {word: counts for word, counts in Occ_T_wc.items() if sum(counts.values()) >= min_count}
+
+
+def countShard(shard):
+    # Worker side of countingParallel: counts a list of (category, text) pairs into flat tables
+    categories = {} # category -> index, in order of first appearance
+    category_counts = []
+    words = {} # word -> index, in order of first appearance
+    pairs = {} # (word index, category index) -> count, in order of first appearance
+    for category, text in shard:
+        if category not in categories:
+            categories[category] = len(categories)
+            category_counts.append(0)
+        c = categories[category]
+        category_counts[c] += 1
+        for word in normalizeText(text):
+            w = words.setdefault(word, len(words))
+            pairs[(w, c)] = pairs.get((w, c), 0) + 1
+    triples = array("q")
+    for (w, c), n in pairs.items():
+        triples.extend((w, c, n))
+    return list(categories), category_counts, list(words), triples
+
+
+def iterShards(records, num_entries, chunk_size):
+    training = itertools.islice(records, num_entries)
+    while True:
+        shard = [(category, text) for _, category, text in itertools.islice(training, chunk_size)]
+        if not shard:
+            return
+        yield shard
+
+
+def countingParallel(records, num_entries, workers, chunk_size=1000):
+    # Map: shards are counted in worker processes. Reduce: the shard tables are merged in corpus order,
+    # so the dicts (including their key order) are the same as a serial run of countingStream.
+    Occ_T_c = {}
+    Occ_T_wc = {}
+    with multiprocessing.Pool(workers) as pool:
+        for categories, category_counts, words, triples in pool.imap(countShard, iterShards(records, num_entries, chunk_size)):
+            for category, n in zip(categories, category_counts):
+                Occ_T_c[category] = Occ_T_c.get(category, 0) + n
+            for i in range(0, len(triples), 3):
+                word = words[triples[i]]
+                category = categories[triples[i + 1]]
+                if word not in Occ_T_wc:
+                    Occ_T_wc[word] = {}
+                Occ_T_wc[word][category] = Occ_T_wc[word].get(category, 0) + triples[i + 2]
     return Occ_T_c, Occ_T_wc
 
 
-def calculateProbabilities(Occ_T_c, Occ_T_wc):
+def calculateProbabilities(Occ_T_c, Occ_T_wc, epsilon=0.1): # epsilon being the smoothing parameter
     categories = list(Occ_T_c.keys())
     T = sum(Occ_T_c.values()) # Total number of biographies in the training corpus
-    epsilon = 0.1 # Smoothing parameter
     Prob_C = {}
     for cat in categories:
         frequency_cat = Occ_T_c[cat]/T # Fraction of biographies of category C in the training corpus
@@ -86,31 +251,89 @@ def calculateProbabilities(Occ_T_c, Occ_T_wc):
     return Prob_C, Prob_W_C
 
 
-def classify(corpus, num_entries, Prob_C, Prob_W_C):
-    output_file = "output.txt"
+def buildModel(Prob_C, Prob_W_C):
+    # Flattens the probability dicts into negative log2 tables, which is what classify actually sums
+    categories = list(Prob_C.keys())
+    vocabulary = list(Prob_W_C.keys())
+    neg_log_prior = array("d", (-math.log(Prob_C[c], 2) for c in categories))
+    neg_log_table = array("d")
+    for word in vocabulary:
+        neg_log_table.extend(-math.log(Prob_W_C[word][c], 2) for c in categories)
+    vocab = {word: row for row, word in enumerate(vocabulary)}
+    return categories, vocab, memoryview(neg_log_prior), memoryview(neg_log_table)
+
+
+MODEL_MAGIC = b"NBM1"
+MODEL_HEADER = struct.Struct("<4sIII") # magic, number of categories, vocabulary size, length of the string block
+
+
+def saveModel(filename, model):
+    # Layout: header, prior row, word rows (float64, row-major by word), then the category and vocabulary names
+    categories, vocab, neg_log_prior, neg_log_table = model
+    names = "\n".join(categories + list(vocab.keys())).encode("utf-8")
+    with open(filename, "wb") as f:
+        f.write(MODEL_HEADER.pack(MODEL_MAGIC, len(categories), len(vocab), len(names)))
+        f.write(neg_log_prior.tobytes())
+        f.write(neg_log_table.tobytes())
+        f.write(names)
+
+
+def loadModel(filename):
+    # The float tables are memory-mapped rather than read, so only the names need decoding
+    with open(filename, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, num_categories, num_words, names_length = MODEL_HEADER.unpack_from(mm, 0)
+    if magic != MODEL_MAGIC:
+        raise ValueError(f"{filename} is not a saved classifier model")
+    start = MODEL_HEADER.size
+    end = start + 8 * num_categories * (num_words + 1)
+    floats = memoryview(mm)[start:end].cast("d")
+    names = mm[end:end + names_length].decode("utf-8").split("\n") if names_length else []
+    categories = names[:num_categories]
+    vocab = {word: row for row, word in enumerate(names[num_categories:])}
+    return categories, vocab, floats[:num_categories], floats[num_categories:]
+
+
+def posteriorFromRows(rows, model):
+    categories, _, neg_log_prior, neg_log_table = model
+    num_categories = len(categories)
+    sum_words = []
+    for i in range(num_categories):
+        column = neg_log_table[i::num_categories] # A strided view, not a copy
+        sum_words.append(functools.reduce(operator.add, map(column.__getitem__, rows), 0.0)) # Summed in word order
+    L = {c: neg_log_prior[i] + sum_words[i] for i, c in enumerate(categories)} # Negative log probabilities to avoid underflow
+
+    # Find the minimum
+    m = min(L.values()) # 4a
+    xs = {}
+    for c, lc in L.items():
+        xs[c] = 2**(m - lc) if (lc - m) < 7 else 0.0 # 4b
+    sum_xs = sum(xs.values())
+    return {c: (xs[c] / sum_xs if sum_xs > 0 else 0.0) for c in categories} # 4c
+
+
+def posteriorProbs(words, model):
+    vocab = model[1]
+    return posteriorFromRows([vocab[word] for word in words if word in vocab], model)
+
+
+def modelTokenizer(model):
+    # Token ids of this tokenizer are the rows of the model's table
+    return Tokenizer(model[1], frozen=True)
+
+
+def classifyRecords(records, model, output_file="output.txt", tokenizer=None):
+    categories = model[0]
     with open(output_file, "w") as f:
-        test_corpus = corpus[num_entries:]
-        categories = list(Prob_C.keys())
         correct_cat_count = 0
-        for name, category, text in test_corpus:
-            words = normalizeText(text)
-            L = {}
-            for c in categories:
-                Lc = -math.log(Prob_C[c], 2) # Computing negative log probabilities to avoid underflow
-                sum_words = 0.0
-                for word in words:
-                    if word in Prob_W_C:
-                        sum_words += -math.log(Prob_W_C[word].get(c, 0.1/(1 + 2 * 0.1)), 2)
-                L[c] = Lc + sum_words
-            
-            # Find the minimum
-            m = min(L.values()) # 4a
-            xs = {}
-            for c, lc in L.items():
-                xs[c] = 2**(m - lc) if (lc - m) < 7 else 0.0 # 4b
-            sum_xs = sum(xs.values())
-            posterior_probs = {c: (xs[c] / sum_xs if sum_xs > 0 else 0.0) for c in categories} # 4c
+        num_records = 0
+        for name, category, text in records:
+            if tokenizer is None:
+                posterior_probs = posteriorProbs(normalizeText(text), model)
+            else:
+                posterior_probs = posteriorFromRows(tokenizer.encode(text), model)
             predict = max(posterior_probs, key=posterior_probs.get)
+            num_records += 1
             if predict == category:
                 correct_cat_count += 1
             f.write(f"{name}. Prediction: {predict}. {'Right' if predict == category else 'Wrong'}.")
@@ -119,19 +342,168 @@ def classify(corpus, num_entries, Prob_C, Prob_W_C):
                 f.write(f"{c}: {posterior_probs[c]:.2f}   ")
             f.write("\n")
             f.write("\n")
-        f.write(f"Overall accuracy: {correct_cat_count} out of {len(test_corpus)} = {correct_cat_count/len(test_corpus):.2f}.")
-        f.close()
+        f.write(f"Overall accuracy: {correct_cat_count} out of {num_records} = {correct_cat_count/num_records:.2f}.")
+
+
+def classify(corpus, num_entries, Prob_C, Prob_W_C):
+    classifyRecords(corpus[num_entries:], buildModel(Prob_C, Prob_W_C))
+
+
+def countsModel(categories, Occ_T_c, category_rows, epsilon, known=None):
+    # Same probabilities as calculateProbabilities + buildModel, but the table rows are token ids or feature buckets
+    T = sum(Occ_T_c.values())
+    neg_log_prior = array("d")
+    for cat in categories:
+        frequency_cat = Occ_T_c[cat]/T
+        neg_log_prior.append(-math.log((frequency_cat + epsilon) / (1 + len(categories) * epsilon), 2))
+    neg_log_table = array("d")
+    rows = [category_rows[cat] for cat in categories]
+    unused = [0.0] * len(categories)
+    for i, counts in enumerate(zip(*rows)):
+        if known is not None and not known[i]: # Never looked up, so not worth a log
+            neg_log_table.extend(unused)
+            continue
+        for cat, count in zip(categories, counts):
+            frequency_wc = count / Occ_T_c[cat]
+            neg_log_table.append(-math.log((frequency_wc + epsilon) / (1 + 2 * epsilon), 2))
+    return categories, None, memoryview(neg_log_prior), memoryview(neg_log_table)
+
+
+def crossValidate(records, num_folds, epsilons=(0.1,)):
+    # Tokenizes and counts every biography once. The training counts of each fold are the
+    # global counts minus the counts of that fold, and every epsilon reuses the same counts.
+    tokenizer = Tokenizer()
+    docs = [(category, tokenizer.encode(text)) for _, category, text in records]
+    if len(docs) < num_folds:
+        raise ValueError(f"cannot split {len(docs)} biographies into {num_folds} folds")
+    num_words = len(tokenizer.words)
+    bounds = [len(docs) * f // num_folds for f in range(num_folds + 1)]
+
+    fold_c = [] # Per fold: number of biographies of each category
+    fold_wc = [] # Per fold: occurrences of each token id, per category
+    total_c = {}
+    total_wc = {}
+    for f in range(num_folds):
+        Occ_c = {}
+        Occ_wc = {}
+        for category, ids in docs[bounds[f]:bounds[f + 1]]:
+            Occ_c[category] = Occ_c.get(category, 0) + 1
+            if category not in Occ_wc:
+                Occ_wc[category] = array("i", bytes(4 * num_words))
+            row = Occ_wc[category]
+            for i in ids:
+                row[i] += 1
+        for category, n in Occ_c.items():
+            total_c[category] = total_c.get(category, 0) + n
+            if category not in total_wc:
+                total_wc[category] = array("i", bytes(4 * num_words))
+            total_wc[category] = array("i", map(operator.add, total_wc[category], Occ_wc[category]))
+        fold_c.append(Occ_c)
+        fold_wc.append(Occ_wc)
+
+    accuracies = {epsilon: [] for epsilon in epsilons}
+    for f in range(num_folds):
+        test_docs = docs[bounds[f]:bounds[f + 1]]
+        # Categories in order of first appearance in the training part, as counting would list them
+        categories = list(dict.fromkeys(category for k, (category, _) in enumerate(docs) if not bounds[f] <= k < bounds[f + 1]))
+        Occ_T_c = {cat: total_c[cat] - fold_c[f].get(cat, 0) for cat in categories}
+        category_rows = {}
+        for cat in categories:
+            if cat in fold_wc[f]:
+                category_rows[cat] = array("i", map(operator.sub, total_wc[cat], fold_wc[f][cat]))
+            else:
+                category_rows[cat] = total_wc[cat]
+        # Tokens that never occur in the training part are unknown words, so classify ignores them
+        known = bytearray(any(counts) for counts in zip(*category_rows.values()))
+        test_rows = [[i for i in ids if known[i]] for _, ids in test_docs]
+
+        for epsilon in epsilons:
+            model = countsModel(categories, Occ_T_c, category_rows, epsilon, known)
+            correct_cat_count = 0
+            for (category, _), rows in zip(test_docs, test_rows):
+                posterior_probs = posteriorFromRows(rows, model)
+                if max(posterior_probs, key=posterior_probs.get) == category:
+                    correct_cat_count += 1
+            accuracies[epsilon].append(correct_cat_count / len(test_docs))
+    return accuracies
+
+
+def printCrossValidation(accuracies):
+    for epsilon, fold_accuracies in accuracies.items():
+        folds = " ".join(f"{accuracy:.2f}" for accuracy in fold_accuracies)
+        print(f"Epsilon {epsilon}: folds {folds}. Mean accuracy = {sum(fold_accuracies) / len(fold_accuracies):.2f}.")
+
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Naive Bayes classifier for biographies")
+    parser.add_argument("input_file", help="corpus of biographies")
+    parser.add_argument("num_entries", type=int, help="number of leading entries used for training")
+    parser.add_argument("--save-model", metavar="FILE", help="write the trained model to FILE")
+    parser.add_argument("--load-model", metavar="FILE", help="classify with the model in FILE instead of training")
+    parser.add_argument("--stream", action="store_true", help="read the corpus one record at a time instead of loading it")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes used for counting")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="biographies per worker task with --workers")
+    parser.add_argument("--fast", action="store_true", help="use the interning tokenizer for counting and scoring")
+    parser.add_argument("--folds", type=int, metavar="K", help="k-fold cross-validation over the first num_entries entries")
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.1], help="smoothing parameter; several values can be swept with --folds")
+    parser.add_argument("--hash-buckets", type=int, metavar="N", help="hash words into N feature buckets instead of keeping a vocabulary")
+    parser.add_argument("--min-count", type=int, default=1, help="drop words (or buckets) seen fewer times in training")
+    args = parser.parse_args()
+    if args.hash_buckets is not None and args.hash_buckets <= 0:
+        parser.error("--hash-buckets must be positive")
+    if args.hash_buckets is not None and (args.save_model or args.load_model or args.fast or args.workers > 1):
+        parser.error("--hash-buckets cannot be combined with --save-model, --load-model, --fast or --workers")
+    if args.folds is not None and (args.hash_buckets is not None or args.load_model or args.min_count > 1):
+        parser.error("--folds cannot be combined with --hash-buckets, --load-model or --min-count")
+    if args.load_model and args.min_count > 1:
+        parser.error("--min-count cannot be combined with --load-model, which keeps the vocabulary of the saved model")
+    if args.folds is None and len(args.epsilon) > 1:
+        parser.error("several --epsilon values need --folds")
+    if args.folds is not None and not 2 <= args.folds <= args.num_entries:
+        parser.error("--folds must be between 2 and num_entries")
+    return args
 
 
 def main():
-    corpus_file = sys.argv[1]   
-    num_entries = int(sys.argv[2])
-    corpus = parseInputFile(corpus_file)
-    
-    Occ_T_c, Occ_T_wc = counting(corpus, num_entries)
-    Prob_C, Prob_W_C = calculateProbabilities(Occ_T_c, Occ_T_wc)
-    classify(corpus, num_entries, Prob_C, Prob_W_C)
+    args = parseArguments()
+    if args.stream:
+        records = iterCorpus(args.input_file)
+    else:
+        records = iter(parseInputFile(args.input_file))
+
+    if args.folds:
+        printCrossValidation(crossValidate(itertools.islice(records, args.num_entries), args.folds, args.epsilon))
+        return
+
+    if args.hash_buckets is not None:
+        features = HashedFeatures(args.hash_buckets)
+        Occ_T_c, category_rows = countingHashed(records, args.num_entries, features, args.min_count)
+        model = countsModel(list(Occ_T_c), Occ_T_c, category_rows, args.epsilon[0], features.known)
+        used = sum(features.known)
+        print(f"Hashed features: {used} of {args.hash_buckets} buckets in use, {len(model[3]) * 8} bytes of log-probability table.")
+        classifyRecords(records, model, tokenizer=features)
+        return
+
+    if args.load_model:
+        model = loadModel(args.load_model)
+        for _ in itertools.islice(records, args.num_entries): # Skipping the training entries
+            pass
+    else:
+        if args.workers > 1:
+            Occ_T_c, Occ_T_wc = countingParallel(records, args.num_entries, args.workers, args.chunk_size)
+        elif args.fast:
+            Occ_T_c, Occ_T_wc = countingFast(records, args.num_entries, Tokenizer())
+        else:
+            Occ_T_c, Occ_T_wc = countingStream(records, args.num_entries)
+        if args.min_count > 1:
+            Occ_T_wc = pruneRareWords(Occ_T_wc, args.min_count)
+        Prob_C, Prob_W_C = calculateProbabilities(Occ_T_c, Occ_T_wc, args.epsilon[0])
+        model = buildModel(Prob_C, Prob_W_C)
+        if args.save_model:
+            saveModel(args.save_model, model)
+    tokenizer = modelTokenizer(model) if args.fast else None
+    classifyRecords(records, model, tokenizer=tokenizer) # The remaining records form the test corpus
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
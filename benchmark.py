@@ -0,0 +1,284 @@
+import argparse
+import contextlib
+import cProfile
+import importlib
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+METRICS = ["wall", "cpu", "peak_kib"]
+NOISE_SECONDS = 0.005 # Time differences below this are never reported as regressions
+
+
+def load(directory: str, module: str):
+    """
+    Imports a module of one of the projects. The project directories have spaces in their names and are not
+    packages, so each one is put on sys.path like its scripts expect.
+
+    Args:
+        directory (str): The project directory, relative to the repository
+        module (str): The name of the module
+
+    Returns:
+        module: The module
+    """
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+def run_main(module, argv: list[str]) -> None:
+    """
+    Runs the main() of a module with a command line, its printed output discarded.
+
+    Args:
+        module (module): The module
+        argv (list[str]): The command line arguments
+    """
+    saved = sys.argv
+    sys.argv = [module.__file__] + argv
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.main()
+    finally:
+        sys.argv = saved
+
+
+def dpll_workload(size: int, directory: str):
+    """Random 3-SAT with size atoms and 4 clauses per atom, solved by DPLLTop."""
+    DPLL = load("DPLL", "DPLL")
+    rng = random.Random(f"dpll:{size}")
+    clauses = [{atom * rng.choice((1, -1)) for atom in rng.sample(range(1, size + 1), 3)} for _ in range(4 * size)]
+    return lambda: DPLL.DPLLTop([set(clause) for clause in clauses])
+
+
+def puzzle_workload(size: int, directory: str):
+    """puzzleSolver moving one piece along a path of size vertices, from one end to the other."""
+    with open(os.path.join(directory, "input.txt"), "w") as f:
+        f.write(f"{size} {size - 1} {size - 1}\n")
+        f.write(" ".join(["A"] + ["Empty"] * (size - 1)) + "\n")
+        f.write(" ".join(["Empty"] * (size - 1) + ["A"]) + "\n")
+        for v in range(1, size):
+            f.write(f"{v} {v + 1}\n")
+
+    def run():
+        puzzleSolver = importlib.reload(load("DPLL", "puzzleSolver")) # Its clauses and variables are module globals
+        puzzleSolver.main()
+    return run
+
+
+def text_workload(size: int, directory: str):
+    """text_classification trained on size biographies (bioCorpus.txt repeated) and tested on a fifth as many."""
+    text_classification = load("Text Classification", "text_classification")
+    records = text_classification.parseInputFile(os.path.join(ROOT, "Text Classification", "bioCorpus.txt"))
+    corpus = os.path.join(directory, "corpus.txt")
+    with open(corpus, "w") as f:
+        for k in range(size + size // 5):
+            name, category, text = records[k % len(records)]
+            f.write(f"{name} {k}\n{category}\n{text}\n\n")
+    return lambda: run_main(text_classification, [corpus, str(size)])
+
+
+def markov_workload(size: int, directory: str):
+    """markov_decision playing size rounds of the bundled input.txt."""
+    markov_decision = load("Markov Decision", "markov_decision")
+    with open(os.path.join(ROOT, "Markov Decision", "input.txt")) as f:
+        lines = f.read().splitlines()
+    params = lines[0].split()
+    params[3], params[4] = str(size), str(max(size // 10, 1)) # Rounds, and a report every tenth of them
+    input_file = os.path.join(directory, "mdp.txt")
+    with open(input_file, "w") as f:
+        f.write("\n".join([" ".join(params)] + lines[1:]) + "\n")
+    return lambda: run_main(markov_decision, ["--input", input_file, "--output", os.path.join(directory, "mdp.out"),
+                                              "--seed", "0"])
+
+
+def graph_input(size: int, directory: str) -> str:
+    """Writes a geometric graph of size vertices with a target of 90% of the greedy value, and returns its name."""
+    graph_generator = load("Hill Climbing vs. Iterative Deepening", "graph_generator")
+    target, _, values, vertex_list, edges = graph_generator.generate("geometric", size, 3.0, seed=0, optimum="greedy")
+    input_file = os.path.join(directory, "graph.txt")
+    graph_generator.write_instance(input_file, target, "N", 10, values, vertex_list, edges)
+    return input_file
+
+
+def hill_climbing_workload(size: int, directory: str):
+    """hill_climbing on a geometric graph of size vertices."""
+    hill_climbing = load("Hill Climbing vs. Iterative Deepening", "hill_climbing")
+    input_file = graph_input(size, directory)
+    return lambda: run_main(hill_climbing, ["--input", input_file, "--seed", "0"])
+
+
+def iterative_deepening_workload(size: int, directory: str):
+    """iterative_deepening on a geometric graph of size vertices."""
+    iterative_deepening = load("Hill Climbing vs. Iterative Deepening", "iterative_deepening")
+    input_file = graph_input(size, directory)
+    return lambda: run_main(iterative_deepening, ["--input", input_file])
+
+
+WORKLOADS = { # Name: (setup, default sizes)
+    "dpll": (dpll_workload, [40, 80]),
+    "puzzle": (puzzle_workload, [4, 6]),
+    "text": (text_workload, [100, 400]),
+    "markov": (markov_workload, [10000, 50000]),
+    "hill-climbing": (hill_climbing_workload, [100, 400]),
+    "iterative-deepening": (iterative_deepening_workload, [15, 25]),
+}
+
+
+def measure(run, repeat: int, profile: bool) -> tuple[dict[str, float], pstats.Stats | None]:
+    """
+    Measures one workload. Wall and CPU time are the best of repeat runs, without tracing; the peak memory comes
+    from one more run under tracemalloc, and the profile from another under cProfile.
+
+    Args:
+        run (callable): The workload
+        repeat (int): The number of timed runs
+        profile (bool): True to also run it under cProfile
+
+    Returns:
+        tuple[dict[str, float], pstats.Stats | None]: The wall and CPU time in seconds and the peak memory in KiB, and the profile
+    """
+    wall = cpu = float("inf")
+    for _ in range(repeat):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        run()
+        wall = min(wall, time.perf_counter() - start_wall)
+        cpu = min(cpu, time.process_time() - start_cpu)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(run)
+        stats = pstats.Stats(profiler)
+    return {"wall": round(wall, 6), "cpu": round(cpu, 6), "peak_kib": peak // 1024}, stats
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compares the results with a baseline. A metric regresses when it grows by more than threshold (a fraction of
+    its baseline value); times also have to grow by more than NOISE_SECONDS.
+
+    Args:
+        results (dict): The metrics of each "workload:size"
+        baseline (dict): The same, from an earlier run
+        threshold (float): The allowed relative growth
+
+    Returns:
+        list[str]: A description of each regression
+    """
+    found = []
+    for key, metrics in results.items():
+        if key not in baseline:
+            continue
+        for metric in METRICS:
+            old, new = baseline[key][metric], metrics[metric]
+            if new > old * (1 + threshold) and (metric == "peak_kib" or new - old > NOISE_SECONDS):
+                found.append(f"{key} {metric}: {old} -> {new} (+{(new - old) / old if old else float('inf'):.0%})")
+    return found
+
+
+def parse_sizes(values: list[str]) -> dict[str, list[int]]:
+    """
+    Parses the --size options, of the form NAME=N[,N...].
+
+    Args:
+        values (list[str]): The options
+
+    Returns:
+        dict[str, list[int]]: The sizes of each workload named
+    """
+    sizes = {}
+    for value in values:
+        name, _, numbers = value.partition("=")
+        if name not in WORKLOADS or not numbers:
+            raise argparse.ArgumentTypeError(f"invalid --size {value!r}")
+        sizes[name] = [int(n) for n in numbers.split(",")]
+    return sizes
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line options.
+
+    Returns:
+        argparse.Namespace: The options
+    """
+    parser = argparse.ArgumentParser(description="Runs named workloads of every project and records their performance")
+    parser.add_argument("workloads", nargs="*", metavar="WORKLOAD",
+                        help=f"workloads to run (default: all of {', '.join(WORKLOADS)})")
+    parser.add_argument("--size", action="append", default=[], metavar="NAME=N[,N...]",
+                        help="sizes of a workload, instead of its defaults (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of each workload, the best is kept (default: 3)")
+    parser.add_argument("--profile", action="store_true", help="print the cProfile hot spots of each workload")
+    parser.add_argument("--top", type=int, default=10, help="functions listed with --profile (default: 10)")
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="fail if a metric regressed compared with this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative growth of a metric counted as a regression (default: 0.25)")
+    parser.add_argument("--list", action="store_true", help="list the workloads and their default sizes")
+    args = parser.parse_args()
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload {unknown[0]!r} (choose from {', '.join(WORKLOADS)})")
+    try:
+        args.sizes = parse_sizes(args.size)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+    return args
+
+
+def main():
+    args = parse_arguments()
+    if args.list:
+        for name, (setup, sizes) in WORKLOADS.items():
+            print(f"{name:<20} {','.join(map(str, sizes)):<12} {setup.__doc__}")
+        return
+    results = {}
+    print(f"{'workload':<28} {'wall s':>9} {'cpu s':>9} {'peak KiB':>9}")
+    for name in args.workloads or WORKLOADS:
+        setup, default_sizes = WORKLOADS[name]
+        for size in args.sizes.get(name, default_sizes):
+            key = f"{name}:{size}"
+            with tempfile.TemporaryDirectory() as directory:
+                cwd = os.getcwd()
+                os.chdir(directory) # Output files the programs write go there
+                try:
+                    metrics, stats = measure(setup(size, directory), args.repeat, args.profile)
+                finally:
+                    os.chdir(cwd)
+            results[key] = metrics
+            print(f"{key:<28} {metrics['wall']:>9.3f} {metrics['cpu']:>9.3f} {metrics['peak_kib']:>9}")
+            if stats is not None:
+                stats.sort_stats("cumulative").print_stats(args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}.")
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.threshold)
+        if found:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()